@@ -0,0 +1 @@
+"""Helpers for the EDA notebook."""
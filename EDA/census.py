@@ -0,0 +1,109 @@
+"""
+State populations from the census estimates, and killings per 100,000.
+
+The notebook reads every column of nst-est2019-alldata.csv, averages
+POPESTIMATE2013..2019 by adding the columns up one at a time, merges in
+csvData.csv for the state codes, then merges again with the killings counts.
+Here the census file is read once (only NAME, STATE and the POPESTIMATE
+columns), turned into a state code x year table and cached, and
+rate_per_100k() does a single join for any grouping:
+
+    rate_per_100k('state')
+    rate_per_100k(['state', 'year'])
+    rate_per_100k(['victims_race', 'state'])
+
+The census estimates aren't broken down by race, so race (or any other
+non-state column) rates use the whole state's population.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from .loader import load_killings
+
+CENSUS_DIR = Path(__file__).resolve().parent.parent / 'US_Census_Data'
+CENSUS_CSV = CENSUS_DIR / 'nst-est2019-alldata.csv'
+STATE_CODES_CSV = CENSUS_DIR / 'csvData.csv'
+POPULATION_CACHE = CENSUS_DIR / 'state_population.csv'
+
+# the years the notebook averages over
+YEARS = range(2013, 2020)
+
+
+def read_census(census_csv=CENSUS_CSV, state_codes_csv=STATE_CODES_CSV):
+    """Population estimates as a DataFrame indexed by state code, one column per year."""
+    header = pd.read_csv(census_csv, nrows=0).columns
+    estimates = [col for col in header if col.startswith('POPESTIMATE')]
+    census = pd.read_csv(census_csv, usecols=['STATE', 'NAME'] + estimates)
+    census = census[census['STATE'] != 0]  # the US and region totals
+
+    codes = pd.read_csv(state_codes_csv, encoding='utf-8-sig', usecols=['State', 'Code'])
+    codes = pd.Series(codes['Code'].to_numpy(), index=codes['State'])
+    population = census.set_index(census['NAME'].map(codes).rename('state'))[estimates]
+    population = population[population.index.notna()]  # Puerto Rico has no code in csvData.csv
+    population.columns = [int(col[len('POPESTIMATE'):]) for col in estimates]
+    return population
+
+
+@lru_cache(maxsize=None)
+def _population_table(census_csv, cache_path):
+    census_csv, cache_path = Path(census_csv), Path(cache_path)
+    if cache_path.exists() and cache_path.stat().st_mtime >= census_csv.stat().st_mtime:
+        population = pd.read_csv(cache_path, index_col='state')
+        population.columns = population.columns.astype(int)
+        return population
+    population = read_census(census_csv)
+    population.to_csv(cache_path)
+    return population
+
+
+def population_table(census_csv=CENSUS_CSV, cache_path=POPULATION_CACHE):
+    """read_census(), cached on disk (and in memory) until the census file changes."""
+    return _population_table(str(census_csv), str(cache_path)).copy()
+
+
+def state_names(state_codes_csv=STATE_CODES_CSV):
+    """Full state name per state code."""
+    codes = pd.read_csv(state_codes_csv, encoding='utf-8-sig', usecols=['State', 'Code'])
+    return pd.Series(codes['State'].to_numpy(), index=codes['Code'], name='name')
+
+
+def state_population(years=YEARS):
+    """Mean population per state code over years."""
+    return population_table()[list(years)].mean(axis=1).rename('population')
+
+
+def _population_for(group_by, years):
+    population = population_table()[list(years)]
+    if 'state' in group_by and 'year' in group_by:
+        return population.rename_axis(columns='year').stack().rename('population')
+    if 'state' in group_by:
+        return population.mean(axis=1).rename('population')
+    if 'year' in group_by:
+        return population.sum().rename_axis('year').rename('population')
+    return population.sum().mean()
+
+
+def rate_per_100k(group_by='state', killings=None, years=YEARS):
+    """
+    Killings per 100,000 people for each group in group_by.  'year' can be
+    used as a grouping column (the year of the incident date).  Groups outside
+    years get no population and a NaN rate.
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+    if killings is None:
+        columns = ['date'] + [col for col in group_by if col != 'year']
+        killings = load_killings(columns=list(dict.fromkeys(columns)))
+    if 'year' in group_by:
+        killings = killings.assign(year=killings['date'].dt.year)
+
+    counts = killings.groupby(group_by, observed=True).size().rename('killings').to_frame()
+    population = _population_for(group_by, years)
+    if isinstance(population, pd.Series):
+        counts = counts.join(population, on=list(population.index.names))
+    else:
+        counts['population'] = population
+    counts['per_100k'] = counts['killings'] / counts['population'] * 100_000
+    return counts.reset_index()
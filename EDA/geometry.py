@@ -0,0 +1,60 @@
+"""
+Projected, de-duplicated state shapes cached as GeoParquet.
+
+The notebook reads usa-states-census-2014.shp, reprojects every vertex to
+EPSG:3395 (twice) and computes centroids again for each plot.  The shapefile
+also lists the nine Northeast states twice (the "Why are there duplicates?"
+New Jersey rows); the repeated rows are exact copies.
+
+build_states() does all of that once and stores, per state, the projected
+outline at a few levels of detail plus its centroid.  load_states() reads
+back only the level that's asked for, already projected:
+
+    states = load_states('low')   # fast national choropleths
+    states = load_states('full')  # full resolution
+"""
+
+import warnings
+from pathlib import Path
+
+import geopandas
+
+SHAPEFILE = Path(__file__).resolve().parent.parent / 'geopandas' / 'data' / 'usa-states-census-2014.shp'
+STATES_CACHE = SHAPEFILE.with_suffix('.parquet')
+
+CRS = 'EPSG:3395'
+
+# simplify() tolerance in metres (EPSG:3395 units) for each level of detail
+DETAIL_LEVELS = {'full': 0, 'medium': 2_000, 'low': 10_000}
+
+ATTRIBUTE_COLUMNS = ['STATEFP', 'STUSPS', 'NAME', 'region']
+
+
+def build_states(shapefile=SHAPEFILE):
+    states = geopandas.read_file(shapefile)
+    states = states.drop_duplicates('STUSPS').to_crs(CRS).reset_index(drop=True)
+    states = states[ATTRIBUTE_COLUMNS + ['geometry']]
+    for level, tolerance in DETAIL_LEVELS.items():
+        if tolerance:
+            states[F'geometry_{level}'] = states.geometry.simplify(tolerance, preserve_topology=True)
+    states['centroid'] = states.geometry.centroid
+    return states
+
+
+def load_states(detail='full', cache_path=STATES_CACHE, shapefile=SHAPEFILE):
+    """
+    State shapes in EPSG:3395 at the given level of detail, plus a centroid
+    column.  The cache is rebuilt when the shapefile is newer than it.
+    """
+    cache_path, shapefile = Path(cache_path), Path(shapefile)
+    if not cache_path.exists() or cache_path.stat().st_mtime < shapefile.stat().st_mtime:
+        build_states(shapefile).to_parquet(cache_path, index=False)
+
+    geometry = 'geometry' if detail == 'full' else F'geometry_{detail}'
+    with warnings.catch_warnings():
+        # the simplified levels are read without the primary geometry column; set_geometry below picks it
+        warnings.filterwarnings('ignore', 'Multiple non-primary geometry columns', UserWarning)
+        states = geopandas.read_parquet(cache_path, columns=ATTRIBUTE_COLUMNS + [geometry, 'centroid'])
+    if geometry != 'geometry':
+        states = states.set_geometry(geometry).rename_geometry('geometry')
+    return states
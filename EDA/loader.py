@@ -0,0 +1,86 @@
+"""
+Loading the clean police killings data for the EDA notebook.
+
+load_killings() reads police_killings_clean.parquet when the cleaner has
+written one, so the dtypes come back as they were saved (categoricals,
+datetime64 dates, nullable int zipcodes) and only the requested columns are
+read off disk:
+
+    killings = load_killings(columns=['date', 'state'])
+
+Without the Parquet file it falls back to the CSV and converts the same
+columns by hand.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from cleaning.dates import parse_dates
+from cleaning.pipeline import AGE_DTYPE, CLEAN_CSV, CLEAN_PARQUET, READ_DTYPES, ZIPCODE_DTYPE
+from cleaning.stage_cache import memoize
+
+CLEAN_DIR = Path(__file__).resolve().parent.parent / 'cleaning' / 'csv_files'
+
+# Labels the EDA notebook uses for the cleaner's column names
+DISPLAY_NAMES = {
+    'victims_name': 'Victims Name',
+    'victims_age': 'Victims Age',
+    'victims_gender': 'Victims Gender',
+    'victims_race': 'Victims Race',
+    'victim_img_url': 'Victim Image URL',
+    'date': 'Date',
+    'street_address': 'Street Address',
+    'city': 'City',
+    'state': 'State',
+    'zipcode': 'Zipcode',
+    'county': 'County',
+    'agency_resp_for_death': 'Agency Responsible for Death',
+    'cause_of_death': 'Cause of death',
+    'desc_of_circumstances': 'Description of Circumstances',
+    'official_disposition_of_death': 'Official Disposition of Death',
+    'criminal_charges': 'Criminal Charges',
+    'news_article_link': 'News Article Link',
+    'mental_illness': 'Mental Illness',
+    'unarmed': 'Unarmed',
+    'alleged_weapon': 'Alleged Weapon',
+    'threat_level': 'Threat Level',
+    'fleeing': 'Fleeing',
+    'video_surveillance': 'Video Surveillance',
+    'geo_type': 'Geography Type',
+    'weapon_category': 'Weapon Category',
+    'first_name': 'First Name',
+    'last_name': 'Last Name',
+}
+
+
+@memoize
+def _read_csv(path, columns):
+    dtypes = {col: dtype for col, dtype in READ_DTYPES.items() if col != 'victims_age'}
+    dtypes.update(victims_age=AGE_DTYPE, zipcode=ZIPCODE_DTYPE)
+    if columns is not None:
+        dtypes = {col: dtype for col, dtype in dtypes.items() if col in columns}
+    killings = pd.read_csv(path, usecols=columns, dtype=dtypes)
+    if 'date' in killings:
+        killings['date'], _ = parse_dates(killings['date'])
+    return killings
+
+
+def load_killings(columns=None, display_names=False, directory=CLEAN_DIR):
+    """
+    Load the clean data, preferring the Parquet file.  columns uses the
+    cleaner's names ('date', 'victims_race', ...); display_names=True renames
+    the result to the labels the notebook uses ('Date', 'Victims Race', ...).
+    """
+    directory = Path(directory)
+    columns = list(columns) if columns is not None else None
+    parquet_path = directory / CLEAN_PARQUET
+    if parquet_path.exists():
+        killings = pd.read_parquet(parquet_path, columns=columns)
+    else:
+        killings = _read_csv(directory / CLEAN_CSV, columns)
+
+    if display_names:
+        killings = killings.rename(columns=DISPLAY_NAMES)
+    return killings
+
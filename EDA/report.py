@@ -0,0 +1,179 @@
+"""
+Rendering the EDA notebook's charts to image files, in parallel.
+
+The notebook draws its charts one cell at a time: the monthly series and its
+seven yearly slices, the age histograms and per-race kde/hist plots, the
+unarmed crosstab and the state choropleths.  build_report() renders a list of
+chart specs to PNG/SVG across a process pool instead, with no display needed:
+
+    from EDA.report import build_report
+    timings = build_report()              # every chart in default_charts()
+    timings = build_report(processes=1)   # in this process, no pool
+
+A chart spec is a dict: name, draw (a module-level function called as
+draw(data, ax, **kwargs)), and optionally kwargs and figsize.  The data is
+loaded once in the parent and handed to each worker when it starts, so the
+charts in a worker share one copy of it.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import matplotlib
+from matplotlib.figure import Figure
+import pandas as pd
+
+from .census import rate_per_100k, state_names
+from .distributions import grouped_histogram, grouped_kde, plot_groups
+from .geometry import load_states
+from .loader import CLEAN_DIR, DISPLAY_NAMES, load_killings
+from .rollup import counts, load_cube
+
+REPORT_DIR = Path(__file__).resolve().parent / 'report'
+
+FIGSIZE = (10, 5)
+MAP_FIGSIZE = (15, 10)
+RATE = 'Killings per 100,000'
+
+# set by _init_worker in each pool process (and by build_report when run in-process)
+_data = None
+
+
+def load_report_data(directory=CLEAN_DIR, detail='medium'):
+    """Everything the charts read: the killings, the monthly counts and the per-state rates and shapes."""
+    killings = load_killings(directory=directory)
+    rates = rate_per_100k('state', killings=killings)
+    rates = rates.rename(columns={'state': 'Code', 'per_100k': RATE})
+    rates['State'] = rates['Code'].map(state_names())
+    states = load_states(detail)
+    return {
+        'killings': killings.rename(columns=DISPLAY_NAMES),
+        'per_month': counts(load_cube(directory), 'month'),
+        'rates': rates.sort_values(RATE),
+        'states': pd.merge(states, rates, left_on='STUSPS', right_on='Code'),
+    }
+
+
+# Chart functions; each draws onto ax from the shared data.
+
+def monthly_series(data, ax, year=None):
+    per_month = data['per_month']
+    if year is not None:
+        per_month = per_month[per_month.index.year == year]
+    ax.plot(per_month.index, per_month.values)
+    ax.set_title(F"Killings per month{'' if year is None else F' ({year})'}")
+
+
+def age_histogram(data, ax, by=None, groups=None):
+    killings = data['killings']
+    if by is None:
+        killings['Victims Age'].plot(kind='hist', ax=ax)
+        return
+    if groups is not None:
+        killings = killings[killings[by].isin(groups)]
+    plot_groups(grouped_histogram(killings, 'Victims Age', by, bins=10), ax)
+
+
+def age_kde(data, ax, by='Victims Race'):
+    plot_groups(grouped_kde(data['killings'], 'Victims Age', by), ax)
+
+
+def unarmed_by_race(data, ax):
+    killings = data['killings']
+    pd.crosstab(killings['Victims Race'], killings['Unarmed'], normalize='index').plot(kind='bar', ax=ax)
+
+
+def state_rates(data, ax, top=None):
+    rates = data['rates'] if top is None else data['rates'][-top:]
+    rates.plot.barh(x='State', y=RATE, ax=ax)
+
+
+def rate_bubbles(data, ax):
+    states = data['states']
+    states.boundary.plot(color='lightgrey', ax=ax)
+    states['centroid'].plot(cmap='spring', markersize=states[RATE] * 50, ax=ax)
+
+
+def top_states_map(data, ax, top=10):
+    states = data['states']
+    states.boundary.plot(color='black', ax=ax)
+    states.sort_values(RATE, ascending=False)[:top].plot(ax=ax, color='red', hatch='///')
+
+
+def rate_choropleth(data, ax):
+    states = data['states']
+    states.boundary.plot(color='lightgrey', ax=ax)
+    states.plot(column=RATE, ax=ax, legend=True, cmap='Reds',
+                legend_kwds={'label': 'Number of Police killings per 100,000', 'orientation': 'horizontal'})
+
+
+def default_charts(data):
+    """The notebook's charts as specs."""
+    years = sorted(set(data['per_month'].index.year))
+    return ([{'name': 'killings_per_month', 'draw': monthly_series}]
+            + [{'name': F'killings_per_month_{year}', 'draw': monthly_series, 'kwargs': {'year': year}}
+               for year in years]
+            + [{'name': 'age_histogram', 'draw': age_histogram},
+               {'name': 'age_kde_by_race', 'draw': age_kde},
+               {'name': 'age_histogram_by_race', 'draw': age_histogram, 'kwargs': {'by': 'Victims Race'}},
+               {'name': 'age_histogram_white_black_hispanic', 'draw': age_histogram,
+                'kwargs': {'by': 'Victims Race', 'groups': ['white', 'black', 'hispanic']}},
+               {'name': 'age_histogram_by_gender', 'draw': age_histogram, 'kwargs': {'by': 'Victims Gender'}},
+               {'name': 'unarmed_by_race', 'draw': unarmed_by_race},
+               {'name': 'state_rates', 'draw': state_rates, 'figsize': (10, 10)},
+               {'name': 'state_rates_top_10', 'draw': state_rates, 'kwargs': {'top': 10}, 'figsize': (10, 10)},
+               {'name': 'rate_bubbles', 'draw': rate_bubbles},
+               {'name': 'top_10_states_map', 'draw': top_states_map, 'figsize': MAP_FIGSIZE},
+               {'name': 'rate_choropleth', 'draw': rate_choropleth, 'figsize': MAP_FIGSIZE}])
+
+
+def render_chart(chart, out_dir, fmt='png'):
+    """Draw one chart spec with the loaded data and save it.  Returns (name, path, seconds)."""
+    start = time.perf_counter()
+    # a bare Figure renders with Agg and never touches pyplot's figure manager
+    fig = Figure(figsize=chart.get('figsize', FIGSIZE))
+    ax = fig.subplots()
+    chart['draw'](_data, ax, **chart.get('kwargs', {}))
+    path = Path(out_dir) / F"{chart['name']}.{fmt}"
+    fig.savefig(path, bbox_inches='tight')
+    return chart['name'], str(path), time.perf_counter() - start
+
+
+def _init_worker(data):
+    global _data
+    matplotlib.use('Agg')
+    _data = data
+
+
+def build_report(charts=None, out_dir=REPORT_DIR, fmt='png', processes=None, data=None):
+    """
+    Render charts (default_charts() when None) to out_dir as fmt files across
+    processes workers (os.cpu_count() when None, in-process when 1).  Prints
+    each chart's time as it finishes and returns them as a DataFrame.
+    """
+    global _data
+    start = time.perf_counter()
+    data = load_report_data() if data is None else data
+    charts = default_charts(data) if charts is None else charts
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    processes = min(processes or os.cpu_count() or 1, len(charts)) or 1
+
+    timings = []
+    if processes == 1:
+        _data = data
+        for chart in charts:
+            timings.append(render_chart(chart, out_dir, fmt))
+            print(F"{timings[-1][0]}: {timings[-1][2]:.2f}s")
+    else:
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(data,)) as pool:
+            futures = [pool.submit(render_chart, chart, out_dir, fmt) for chart in charts]
+            for future in as_completed(futures):
+                timings.append(future.result())
+                print(F"{timings[-1][0]}: {timings[-1][2]:.2f}s")
+
+    timings = pd.DataFrame(timings, columns=['chart', 'path', 'seconds'])
+    print(F"Rendered {len(timings)} charts with {processes} process(es) in {time.perf_counter() - start:.2f}s")
+    return timings
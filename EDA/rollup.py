@@ -0,0 +1,95 @@
+"""
+Pre-aggregated incident counts for the time-series plots.
+
+The notebook rebuilds its monthly series from the incident table for every
+plot (value_counts on the dates, then groupby(pd.Grouper(freq='M'))) and
+slices twelve-month windows out of it by hand.  build_cube() counts incidents
+once per
+
+    day x state x victims_race x victims_gender x cause_of_death x geo_type
+
+and saves that next to the clean data.  counts() / rolling() answer any
+daily, monthly or yearly series (optionally per state, race, ...) from the
+cube without touching the incident table again:
+
+    cube = load_cube()
+    killings_per_month = counts(cube, 'month')
+    per_state_per_year = counts(cube, 'year', by='state')
+    texas_per_month = counts(cube, 'month', state='TX')
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from cleaning.pipeline import CLEAN_PARQUET
+
+from .loader import CLEAN_DIR, load_killings
+
+CUBE_PARQUET = 'police_killings_cube.parquet'
+
+DIMENSIONS = ['state', 'victims_race', 'victims_gender', 'cause_of_death', 'geo_type']
+
+# offset objects rather than 'M'/'Y' strings, whose spelling changed between pandas versions
+FREQUENCIES = {'day': pd.offsets.Day(), 'month': pd.offsets.MonthEnd(), 'year': pd.offsets.YearEnd()}
+
+
+def build_cube(killings):
+    """Incident counts per day and combination of DIMENSIONS (only combinations that occur)."""
+    cube = (killings.assign(date=killings['date'].dt.normalize())
+            .groupby(['date'] + DIMENSIONS, observed=True, dropna=False)
+            .size()
+            .rename('count')
+            .reset_index())
+    cube['count'] = cube['count'].astype('int32')
+    return cube.sort_values('date', ignore_index=True)
+
+
+def load_cube(directory=CLEAN_DIR, rebuild=False):
+    """Load the saved cube, rebuilding it first if the clean data is newer."""
+    directory = Path(directory)
+    cube_path = directory / CUBE_PARQUET
+    clean_path = directory / CLEAN_PARQUET
+    stale = (not cube_path.exists()
+             or (clean_path.exists() and clean_path.stat().st_mtime > cube_path.stat().st_mtime))
+    if rebuild or stale:
+        cube = build_cube(load_killings(['date'] + DIMENSIONS, directory=directory))
+        cube.to_parquet(cube_path, index=False)
+        return cube
+    return pd.read_parquet(cube_path)
+
+
+def _filter(cube, filters):
+    for dim, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        cube = cube[cube[dim].isin(values)]
+    return cube
+
+
+def counts(cube, freq='month', by=None, start=None, end=None, **filters):
+    """
+    Incident counts per freq ('day', 'month' or 'year').  by names one or more
+    dimensions to split the series into columns; keyword filters keep only
+    matching rows, e.g. victims_race='black' or state=['TX', 'OK'].  start and
+    end (inclusive) fix the window, so counts(cube, 'month', start='2014-01-01',
+    end='2014-12-31') is always that year's twelve months.
+    """
+    cube = _filter(cube, filters)
+    first = pd.Timestamp(start) if start is not None else cube['date'].min()
+    last = pd.Timestamp(end) if end is not None else cube['date'].max()
+    if start is not None or end is not None:
+        cube = cube[cube['date'].between(first, last)]
+    by = [by] if isinstance(by, str) else list(by or [])
+    offset = FREQUENCIES[freq]
+    grouped = cube.groupby([pd.Grouper(key='date', freq=offset)] + by, observed=True)['count'].sum()
+    if by:
+        grouped = grouped.unstack(by, fill_value=0)
+    # periods with no incidents at all still get a 0, up to start and end when they're given
+    periods = pd.date_range(offset.rollforward(first), offset.rollforward(last), freq=offset, name='date') \
+        if pd.notna(first) and pd.notna(last) else grouped.index
+    return grouped.reindex(periods, fill_value=0).astype('int64')
+
+
+def rolling(cube, window, freq='month', by=None, **filters):
+    """Rolling sum over window periods of counts(cube, freq, by, **filters)."""
+    return counts(cube, freq, by, **filters).rolling(window).sum()
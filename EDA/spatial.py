@@ -0,0 +1,78 @@
+"""
+Assigning incident coordinates to states (and later counties / ZCTAs).
+
+County, zipcode and geo_type are filled in by hand in the cleaning notebook,
+one killings.loc[...] at a time.  For feeds that come with coordinates,
+assign_points() looks every point up against an STRtree over the polygons,
+so each point is only tested against the few shapes whose bounding boxes
+contain it instead of every shape:
+
+    states = load_states()
+    killings['state_from_coords'] = assign_points(lon, lat, states, 'STUSPS')
+
+Any polygon layer works the same way; load_polygons() reads a county or
+ZCTA shapefile into the same projected, de-duplicated form as the states.
+"""
+
+import geopandas
+import numpy as np
+import pandas as pd
+from shapely import STRtree
+
+from .geometry import CRS
+
+# points are projected and queried this many at a time to keep memory flat
+CHUNKSIZE = 1_000_000
+
+
+def load_polygons(path, key):
+    """Read a polygon layer, keep one row per key and project it like the states."""
+    polygons = geopandas.read_file(path)
+    return polygons.drop_duplicates(key).to_crs(CRS).reset_index(drop=True)
+
+
+def _project(lon, lat, crs):
+    points = geopandas.GeoSeries(geopandas.points_from_xy(lon, lat), crs='EPSG:4326')
+    return points.to_crs(crs).values
+
+
+def assign_points(lon, lat, polygons, key, tree=None, chunksize=CHUNKSIZE):
+    """
+    polygons[key] for the polygon containing each (lon, lat) point (WGS84
+    degrees, projected to polygons.crs for the lookup), NaN for
+    points outside every polygon (or with missing coordinates).  A point on a
+    shared border gets the first polygon it touches.  Pass tree to reuse an
+    STRtree built over polygons.geometry across calls.
+    """
+    if polygons.crs is None:
+        raise ValueError("polygons have no CRS, so the points can't be projected onto them")
+    lon = np.asarray(lon, dtype='float64')
+    lat = np.asarray(lat, dtype='float64')
+    if tree is None:
+        tree = STRtree(polygons.geometry.values)
+    keys = polygons[key].to_numpy()
+
+    found = np.full(len(lon), -1, dtype=np.int64)
+    for start in range(0, len(lon), chunksize):
+        stop = start + chunksize
+        points = _project(lon[start:stop], lat[start:stop], polygons.crs)
+        point_idx, polygon_idx = tree.query(points, predicate='intersects')
+        # keep the first hit per point
+        point_idx, first = np.unique(point_idx, return_index=True)
+        found[start + point_idx] = polygon_idx[first]
+
+    result = pd.Series(keys[np.maximum(found, 0)], dtype=object)
+    result[found < 0] = np.nan
+    return result
+
+
+def assign_incidents(incidents, layers, lon='longitude', lat='latitude'):
+    """
+    Add one column per layer to incidents.  layers maps the new column name
+    to (polygons, key), e.g. {'state_from_coords': (load_states(), 'STUSPS')}.
+    """
+    incidents = incidents.copy()
+    for column, (polygons, key) in layers.items():
+        values = assign_points(incidents[lon], incidents[lat], polygons, key)
+        incidents[column] = values.to_numpy()
+    return incidents
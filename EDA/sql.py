@@ -0,0 +1,87 @@
+"""
+SQL over the clean incidents and the census tables, with DuckDB.
+
+Ad-hoc slices like "unarmed rate by state and year" are one query instead of
+a new groupby / crosstab over the whole frame:
+
+    from EDA.sql import query
+    query('''
+        SELECT state, year(date) AS year, count(*) AS killings,
+               avg((unarmed = 'unarmed')::INTEGER) AS unarmed_rate
+        FROM killings
+        WHERE date >= DATE '2015-01-01'
+        GROUP BY ALL
+        ORDER BY state, year
+    ''')
+
+The connection has these tables:
+
+- killings: a view over police_killings_clean.parquet (or every file matching
+  a glob, for merged feeds), with the cleaner's column names.  DuckDB reads
+  only the columns a query uses and skips row groups its WHERE rules out,
+- cube: the daily counts from rollup.py, when police_killings_cube.parquet
+  has been written,
+- population: state, year, population from the census estimates,
+- states: state code and name.
+
+DuckDB runs each query on all cores and spills to temp_directory when an
+aggregation doesn't fit in memory_limit, so queries over tens of millions of
+rows don't need the frame in pandas first.  duckdb is optional; it's only
+imported by connect().
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+from cleaning.pipeline import CLEAN_PARQUET
+
+from .census import population_table, state_names
+from .loader import CLEAN_DIR
+from .rollup import CUBE_PARQUET
+
+
+def _quote(path):
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def connect(directory=CLEAN_DIR, parquet=None, threads=None, memory_limit=None, temp_directory=None):
+    """
+    A new in-memory DuckDB connection with the tables above.  parquet
+    overrides the clean Parquet path and may be a glob ('merged/*.parquet').
+    threads, memory_limit ('8GB') and temp_directory default to DuckDB's
+    own settings (all cores, 80% of RAM, a .tmp directory next to the data).
+    """
+    import duckdb
+
+    directory = Path(directory)
+    config = {key: value for key, value in [('threads', threads), ('memory_limit', memory_limit),
+                                            ('temp_directory', temp_directory)] if value is not None}
+    connection = duckdb.connect(':memory:', config={key: str(value) for key, value in config.items()})
+
+    parquet = parquet or directory / CLEAN_PARQUET
+    connection.execute(F"CREATE VIEW killings AS SELECT * FROM read_parquet({_quote(parquet)})")
+    if (directory / CUBE_PARQUET).exists():
+        connection.execute(F"CREATE VIEW cube AS SELECT * FROM read_parquet({_quote(directory / CUBE_PARQUET)})")
+
+    population = (population_table().rename_axis(columns='year').stack().rename('population')
+                  .reset_index())
+    states = state_names().rename_axis('state').reset_index()
+    # copied in rather than registered, so they don't depend on the frames staying alive
+    for name, frame in [('population', population), ('states', states)]:
+        connection.register('frame', frame)
+        connection.execute(F"CREATE TABLE {name} AS SELECT * FROM frame")
+        connection.unregister('frame')
+    return connection
+
+
+@lru_cache(maxsize=None)
+def _connection(directory):
+    return connect(directory)
+
+
+def query(sql, params=None, directory=CLEAN_DIR):
+    """
+    Run sql on a connection to directory's clean data (opened once and
+    reused) and return the result as a DataFrame.  params fill ? placeholders.
+    """
+    return _connection(str(directory)).execute(sql, params or []).df()
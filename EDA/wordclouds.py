@@ -0,0 +1,95 @@
+"""
+Word clouds straight from the columns, without the text files.
+
+The notebook's word cloud cells np.savetxt() a column into text_files/, read
+the file back and let WordCloud.generate() split it into words and count them
+again.  word_frequencies() counts the column's values directly and
+word_cloud() hands the counts to WordCloud.generate_from_frequencies(), so a
+value is one entry ('asian/pacific islander' stays one phrase instead of
+three words).
+
+Laying the words out is the slow part of a word cloud, so the masks from
+images/ and the finished layouts are cached, in memory and in
+images/cache/, keyed on the frequencies, the mask and the WordCloud options:
+
+    wc = word_cloud(word_frequencies(killings['First Name'], exclude=['Unknown']),
+                    mask='us-map-america.png', background_color='white')
+    plt.imshow(wc, interpolation='bilinear')
+"""
+
+import hashlib
+import json
+import pickle
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+IMAGES_DIR = Path(__file__).resolve().parent / 'images'
+LAYOUT_CACHE = IMAGES_DIR / 'cache'
+
+
+def word_frequencies(col, exclude=()):
+    """{value: count} for the non-null values of col, leaving out exclude."""
+    counts = col.value_counts(sort=False)
+    counts = counts[(counts > 0) & ~counts.index.isin(list(exclude))]
+    return {str(word): int(count) for word, count in counts.items()}
+
+
+@lru_cache(maxsize=None)
+def _mask(path, mtime):
+    mask = np.array(Image.open(path))
+    mask.flags.writeable = False
+    return mask
+
+
+def load_mask(name, images_dir=IMAGES_DIR):
+    """The image images_dir/name as an array, read once per session."""
+    path = Path(images_dir) / name
+    return _mask(str(path), path.stat().st_mtime)
+
+
+def _layout_key(frequencies, mask_name, options):
+    digest = hashlib.sha256(json.dumps(sorted(frequencies.items())).encode())
+    digest.update(json.dumps([mask_name, sorted(options.items())], default=str).encode())
+    if mask_name is not None:
+        digest.update(load_mask(mask_name).tobytes())
+    return digest.hexdigest()
+
+
+_layouts = {}
+
+
+def word_cloud(frequencies, mask=None, cache_dir=LAYOUT_CACHE, **options):
+    """
+    WordCloud(**options) generated from frequencies (see word_frequencies()),
+    shaped by mask, the name of an image in images/.  A layout computed before
+    for the same frequencies, mask and options is reused instead of redone.
+    """
+    from wordcloud import WordCloud
+
+    wc = WordCloud(mask=None if mask is None else load_mask(mask), **options)
+    key = _layout_key(frequencies, mask, options)
+    cache_path = Path(cache_dir) / F'{key}.pickle'
+    if key not in _layouts and cache_path.exists():
+        with open(cache_path, 'rb') as f:
+            _layouts[key] = pickle.load(f)
+
+    if key in _layouts:
+        wc.layout_ = _layouts[key]
+        # what generate_from_frequencies() would have set
+        top = max(frequencies.values())
+        wc.words_ = {word: count / top for word, count in frequencies.items()}
+    else:
+        wc.generate_from_frequencies(frequencies)
+        _layouts[key] = wc.layout_
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(wc.layout_, f)
+    return wc
+
+
+def word_cloud_of(col, mask=None, exclude=(), **options):
+    """word_cloud() of the values in col."""
+    return word_cloud(word_frequencies(col, exclude), mask, **options)
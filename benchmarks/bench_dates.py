@@ -0,0 +1,39 @@
+"""
+Date parsing: pd.to_datetime with format inference vs dates.parse_dates.
+
+    python -m benchmarks.bench_dates 1000000 5000000
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cleaning.dates import parse_dates
+
+from .timing import timed
+
+
+def make_dates(n_rows, seed=0):
+    """Raw-spreadsheet style m/d/yyyy strings for 2013 - 2019."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2013-01-01', '2019-12-31')
+    picked = days[rng.integers(0, len(days), n_rows)]
+    strings = pd.Series(picked.month.astype(str) + '/' + picked.day.astype(str) + '/' + picked.year.astype(str))
+    return strings.astype(object)
+
+
+def main(sizes):
+    for n_rows in sizes:
+        strings = make_dates(n_rows)
+        as_category = strings.astype('category')
+        _, inferred = timed(pd.to_datetime, strings)
+        _, objects = timed(parse_dates, strings)
+        _, categories = timed(parse_dates, as_category)
+        print(F"{n_rows:>12,} rows | to_datetime (inferred) {inferred:6.3f}s | "
+              F"parse_dates(object) {objects:6.3f}s ({inferred / objects:4.1f}x) | "
+              F"parse_dates(category) {categories:6.4f}s ({inferred / categories:6.1f}x)")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000, 5_000_000])
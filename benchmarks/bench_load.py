@@ -0,0 +1,60 @@
+"""
+Loading the clean data: the notebook's read_csv + to_datetime vs Parquet/Feather.
+
+    python -m benchmarks.bench_load /path/to/police_killings_original.csv 100
+
+The clean frame is repeated `copies` times to get something closer to the
+merged feeds.
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from cleaning import clean_killings, save_killings
+from cleaning.pipeline import CLEAN_CSV, CLEAN_PARQUET
+from EDA.loader import load_killings
+
+from .timing import timed
+
+
+def notebook_load(path):
+    killings = pd.read_csv(path)
+    killings['date'] = pd.to_datetime(killings['date'])
+    return killings
+
+
+def main(raw_path, copies=1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        killings = clean_killings(raw_path)
+    killings = pd.concat([killings] * copies, ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        save_killings(killings, directory)
+        feather_path = directory / 'police_killings_clean.feather'
+        killings.to_feather(feather_path)
+
+        mb = 1024 ** 2
+        print(F"{len(killings):,} rows")
+        print(F"file size   csv {(directory / CLEAN_CSV).stat().st_size / mb:8.1f} MB | "
+              F"parquet {(directory / CLEAN_PARQUET).stat().st_size / mb:6.1f} MB | "
+              F"feather {feather_path.stat().st_size / mb:6.1f} MB")
+
+        _, csv_full = timed(notebook_load, directory / CLEAN_CSV)
+        _, parquet_full = timed(load_killings, directory=directory)
+        _, feather_full = timed(pd.read_feather, feather_path)
+        print(F"all columns csv {csv_full:8.3f}s | parquet {parquet_full:6.3f}s | feather {feather_full:6.3f}s")
+
+        _, csv_two = timed(pd.read_csv, directory / CLEAN_CSV, usecols=['date', 'state'], parse_dates=['date'])
+        _, parquet_two = timed(load_killings, columns=['date', 'state'], directory=directory)
+        _, feather_two = timed(pd.read_feather, feather_path, columns=['date', 'state'])
+        print(F"date, state csv {csv_two:8.3f}s | parquet {parquet_two:6.3f}s | feather {feather_two:6.3f}s")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 1)
@@ -0,0 +1,62 @@
+"""
+Name splitting: the notebook's two HumanName applies vs names.parse_names.
+
+    python -m benchmarks.bench_names 10000 100000
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+from nameparser import HumanName
+
+from cleaning.names import parse_names, split_name
+
+from .timing import timed
+
+FIRST = ['John', 'Michael', 'James', 'Robert', 'David', 'Jose', 'Mary', 'Luis', 'Anthony', 'Jamal',
+         'Mary-Jane', 'Darnell', 'Christopher', 'Juan', 'Kevin', 'Tyrone', 'Eric', 'Maria', 'Dwayne', 'Ali']
+LAST = ['Smith', 'Johnson', 'Williams', 'Brown', 'Garcia', 'Martinez', "O'Neil", 'Davis', 'Lopez', 'Lee',
+        'Washington', 'Nguyen', 'Hernandez', 'Jackson', 'White', 'Harris', 'Thompson', 'Moore', 'King', 'Young']
+MIDDLE = ['Lee', 'Ann', 'J.', 'Marie', 'Allen', 'Ray']
+SUFFIX = ['Jr.', 'Sr.', 'II', 'III']
+
+
+def make_names(n_rows, seed=0):
+    """Mostly "First Last", with middle names, suffixes and withheld names mixed in."""
+    rng = np.random.default_rng(seed)
+    first = np.array(FIRST, dtype=object)[rng.integers(0, len(FIRST), n_rows)]
+    # numbered surnames keep most names distinct, like the real column
+    last = (np.array(LAST, dtype=object)[rng.integers(0, len(LAST), n_rows)]
+            + pd.Series(rng.integers(0, n_rows // 4 + 1, n_rows)).map(lambda i: 'abcdefghij'[i % 10] * (1 + i // 10 % 3)).to_numpy())
+    names = first + ' ' + last
+    kind = rng.random(n_rows)
+    middle = kind < 0.15
+    names[middle] = (first[middle] + ' ' + np.array(MIDDLE, dtype=object)[rng.integers(0, len(MIDDLE), middle.sum())]
+                     + ' ' + last[middle])
+    suffix = (kind >= 0.15) & (kind < 0.2)
+    names[suffix] = names[suffix] + ' ' + np.array(SUFFIX, dtype=object)[rng.integers(0, len(SUFFIX), suffix.sum())]
+    names[(kind >= 0.2) & (kind < 0.22)] = 'Name withheld by police'
+    return pd.Series(names, dtype=object)
+
+
+def legacy_double_apply(names):
+    names_without_police_in_them = names.loc[names.str.contains('police') == False]
+    first = names_without_police_in_them.apply(lambda x: HumanName(x).first)
+    last = names_without_police_in_them.apply(lambda x: HumanName(x).last)
+    return first, last
+
+
+def main(sizes):
+    for n_rows in sizes:
+        names = make_names(n_rows)
+        _, legacy = timed(legacy_double_apply, names)
+        split_name.cache_clear()
+        _, cold = timed(parse_names, names)
+        _, warm = timed(parse_names, names)
+        print(F"{n_rows:>10,} rows ({names.nunique():,} distinct) | double apply {legacy:7.2f}s | "
+              F"parse_names {cold:6.2f}s ({legacy / cold:5.1f}x) | cached rerun {warm:6.3f}s ({legacy / warm:6.1f}x)")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000])
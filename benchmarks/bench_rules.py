@@ -0,0 +1,50 @@
+"""
+Disposition rewrites: the notebook's chain of str.contains cells vs rules.classify.
+
+    python -m benchmarks.bench_rules 1000000 10000000
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cleaning.rules import DISPOSITION_RULES, classify
+
+from .timing import timed
+
+# A sample of the messy spellings that show up in the raw column
+DISPOSITIONS = ['Justified', 'Unjustified', 'Criminal', 'Pending investigation', 'Pending Investigaton',
+                'Ongoing investigation', 'Under Investigation', 'Charged, Convicted', 'Charged, Acquitted',
+                'Justified by District Attorney', 'Justified; Family filed lawsuit', 'No Indictment',
+                'Indicted', 'Charged with murder', 'No known charges', 'No charges', 'Unreported',
+                'Unknown', 'Justified; Criminal unjustified by grand jury', 'Pending']
+
+
+def legacy_chain(col):
+    col = col.copy()
+    for pattern, label in DISPOSITION_RULES:
+        col.loc[col.str.lower().str.contains(pattern)] = label
+    return col.str.lower()
+
+
+def make_column(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.array(DISPOSITIONS, dtype=object)[rng.integers(0, len(DISPOSITIONS), n_rows)]
+    return pd.Series(values, dtype=object)
+
+
+def main(sizes):
+    for n_rows in sizes:
+        col = make_column(n_rows)
+        as_category = col.astype('category')
+        _, chain = timed(legacy_chain, col)
+        _, rules_object = timed(classify, col, DISPOSITION_RULES)
+        _, rules_category = timed(classify, as_category, DISPOSITION_RULES)
+        print(F"{n_rows:>12,} rows | str.contains chain {chain:8.3f}s | "
+              F"classify(object) {rules_object:7.3f}s ({chain / rules_object:5.1f}x) | "
+              F"classify(category) {rules_category:7.4f}s ({chain / rules_category:7.1f}x)")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000, 10_000_000])
@@ -0,0 +1,168 @@
+"""
+Every cleaning stage and the main EDA steps, timed one by one on synthetic data.
+
+    python -m benchmarks.suite 10k 1m 10m
+    python -m benchmarks.suite --compare 1a925dd 0e60a52
+
+The raw tables come from benchmarks.synthetic and are written to
+benchmarks/data/ once per size, then reused.  Each run times
+
+- load: read_killings (read_csv with dtypes, then the column rename),
+- each of the STAGES on its own (drop_empty is the dropna, split_names the
+  name split, clean_disposition the disposition rules, clean_wapo_columns and
+  categorize_weapons the weapon mapping, convert_types the date parse),
+- csv_write: the clean frame to CSV,
+- per_capita_join: rate_per_100k by state,
+- monthly_rollup: build_cube and the monthly counts from it,
+
+and saves the seconds per stage to benchmarks/results/<commit>.json, so two
+commits can be compared with compare_results().  A stage is a regression
+when it takes more than REGRESSION times as long as before.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from cleaning.pipeline import STAGES, read_killings
+from EDA.census import rate_per_100k
+from EDA.rollup import build_cube, counts
+
+from .synthetic import write_incidents
+from .timing import timed
+
+BENCH_DIR = Path(__file__).parent
+DATA_DIR = BENCH_DIR / 'data'
+RESULTS_DIR = BENCH_DIR / 'results'
+
+SIZES = ['10k', '1m', '10m']
+REGRESSION = 1.2
+
+_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_size(size):
+    """'10k' -> 10_000, '1m' -> 1_000_000, '250000' -> 250_000."""
+    size = str(size).lower().replace('_', '')
+    if size[-1] in _SUFFIXES:
+        return int(float(size[:-1]) * _SUFFIXES[size[-1]])
+    return int(size)
+
+
+def incidents_csv(n_rows, data_dir=DATA_DIR):
+    """The synthetic raw CSV for n_rows, generated the first time it's asked for."""
+    path = Path(data_dir) / F'incidents_{n_rows}.csv'
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        print(F"Generating {n_rows:,} rows -> {path}")
+        write_incidents(n_rows, path)
+    return path
+
+
+def git_commit():
+    """Short hash of HEAD, with -dirty when the tree has uncommitted changes."""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_size(path, work_dir):
+    """Seconds per stage for the raw CSV at path."""
+    seconds = {}
+    # the stages print their fill counts; that isn't what's being measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        killings, seconds['load'] = timed(read_killings, path)
+        for stage in STAGES:
+            killings, seconds[stage.__name__] = timed(stage, killings)
+        _, seconds['csv_write'] = timed(lambda: killings.to_csv(Path(work_dir) / 'clean.csv', index=False))
+        _, seconds['per_capita_join'] = timed(lambda: rate_per_100k('state', killings=killings))
+        _, seconds['monthly_rollup'] = timed(lambda: counts(build_cube(killings), 'month'))
+    return seconds
+
+
+def run_suite(sizes=SIZES, data_dir=DATA_DIR, repeat=1):
+    """
+    {n_rows: {stage: seconds}} for each size, keeping the fastest of repeat
+    runs, printed as it goes.
+    """
+    results = {}
+    for size in sizes:
+        n_rows = parse_size(size)
+        path = incidents_csv(n_rows, data_dir)
+        runs = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as work_dir:
+                runs.append(run_size(path, work_dir))
+        results[n_rows] = {stage: min(run[stage] for run in runs) for stage in runs[0]}
+        print(F"{n_rows:>12,} rows | total {sum(results[n_rows].values()):8.2f}s")
+        for stage, elapsed in results[n_rows].items():
+            print(F"    {stage:<22} {elapsed:8.3f}s")
+    return results
+
+
+def save_results(results, commit=None, results_dir=RESULTS_DIR):
+    """Write results to results_dir/<commit>.json and return the path."""
+    commit = commit or git_commit()
+    path = Path(results_dir) / F'{commit}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {'commit': commit,
+              'date': pd.Timestamp.now().isoformat(timespec='seconds'),
+              'machine': platform.machine(),
+              'python': platform.python_version(),
+              'pandas': pd.__version__,
+              'seconds': {str(n_rows): stages for n_rows, stages in results.items()}}
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write('\n')
+    return path
+
+
+def load_results(commit, results_dir=RESULTS_DIR):
+    with open(Path(results_dir) / F'{commit}.json') as f:
+        return json.load(f)
+
+
+def compare_results(old, new, threshold=REGRESSION):
+    """
+    Stage timings of two saved runs (commits or loaded reports) side by side,
+    for the sizes both have, with ratio = new / old and the regressions flagged.
+    """
+    old = load_results(old) if isinstance(old, str) else old
+    new = load_results(new) if isinstance(new, str) else new
+    rows = []
+    for n_rows in sorted(set(old['seconds']) & set(new['seconds']), key=int):
+        before, after = old['seconds'][n_rows], new['seconds'][n_rows]
+        for stage in after:
+            if stage in before:
+                rows.append((int(n_rows), stage, before[stage], after[stage]))
+    comparison = pd.DataFrame(rows, columns=['rows', 'stage', 'old', 'new'])
+    comparison['ratio'] = comparison['new'] / comparison['old']
+    comparison['regression'] = comparison['ratio'] > threshold
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('sizes', nargs='*', default=SIZES, help="row counts, e.g. 10k 1m 10m")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per size; the fastest is kept")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two saved commits")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare_results(*args.compare).to_string(index=False))
+        return
+    path = save_results(run_suite(args.sizes, repeat=args.repeat))
+    print(F"Saved {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Synthetic raw incident tables at any size, for the benchmark suite.
+
+make_incidents() builds a frame with the raw CSV's columns and roughly the
+real mix of values, messiness included: 'Unknown' / 'Unkown' / 'unknown '
+variants, mixed-case dispositions, '40s' and 'Unknown' ages, name suffixes
+and withheld names, weapon spelling variants with trailing spaces, and about
+one row in a thousand completely empty.  States are drawn in proportion to
+their census population and dates are spread over 2013 - 2019.
+
+write_incidents() writes one chunk at a time, so 10M rows don't have to fit
+in memory:
+
+    python -m benchmarks.synthetic 1000000 /tmp/incidents_1m.csv
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cleaning.pipeline import RENAME_COLUMNS, alleged_weapon_dict
+from cleaning.weapons import load_weapon_lines
+from EDA.census import state_population
+
+from .bench_names import make_names
+from .bench_rules import DISPOSITIONS
+
+CHUNKSIZE = 1_000_000
+
+RAW_NAMES = {clean: raw for raw, clean in RENAME_COLUMNS.items()}
+
+# (values, probabilities) for the columns that are just a pick from a short list
+CHOICES = {
+    'victims_gender': (['Male', 'Female', 'Transgender', None], [0.9, 0.07, 0.005, 0.025]),
+    'victims_race': (['White', 'Black', 'Hispanic', 'Asian', 'Pacific Islander', 'Native American',
+                      'Unknown race', 'Unknown Race'], [0.37, 0.27, 0.17, 0.015, 0.005, 0.015, 0.1, 0.005]),
+    'cause_of_death': (['Gunshot', 'Taser', 'Gunshot, Taser', 'Gunshot, Police Dog', 'Physical restraint',
+                        'Beaten/Bludgeoned with instrument', 'Vehicle', 'Tasered'],
+                       [0.85, 0.04, 0.03, 0.01, 0.02, 0.01, 0.03, 0.01]),
+    'criminal_charges': (['No known charges', 'No', 'Charged, Convicted, Sentenced to 5 years',
+                          'Charged, Mistrial', 'Charged, Charges Tossed', 'Charged with manslaughter'],
+                         [0.9, 0.05, 0.02, 0.01, 0.01, 0.01]),
+    'mental_illness': (['No', 'Yes', 'Unknown', 'Unkown', 'unknown', 'Unknown ', 'Drug or alcohol use', None],
+                       [0.6, 0.2, 0.1, 0.02, 0.01, 0.01, 0.04, 0.02]),
+    'unarmed': (['Allegedly Armed', 'Unarmed', 'Unclear', 'Vehicle'], [0.8, 0.08, 0.08, 0.04]),
+    'threat_level': (['attack', 'other', 'undetermined', None], [0.4, 0.2, 0.05, 0.35]),
+    'fleeing': (['Not fleeing', 'Car', 'Foot', 'Other', '0', None], [0.45, 0.12, 0.1, 0.03, 0.05, 0.25]),
+    'video_surveillance': (['No', 'yes', 'Yes', None], [0.5, 0.08, 0.02, 0.4]),
+    'geo_type': (['Suburban', 'Urban', 'Rural', None], [0.5, 0.3, 0.19, 0.01]),
+    'off_duty_killing': (['Off-Duty', None], [0.01, 0.99]),
+}
+
+AGES = [str(age) for age in range(14, 90)] + ['Unknown', '40s']
+CITIES = [F'City {i}' for i in range(3_000)]
+AGENCIES = [F'Agency {i}' for i in range(5_000)]
+
+
+# the common weapons, weighted against one share for every other spelling
+WEAPON_WEIGHTS = {'gun': 400, 'knife': 100, 'vehicle': 50, 'unarmed': 50, 'toy weapon': 15,
+                  'undetermined': 20, 'unknown weapon': 15, 'Gun ': 5}
+
+
+def _weapons():
+    """Every spelling the notebook has seen plus the variants alleged_weapon_dict fixes, as (values, weights)."""
+    spellings = list(dict.fromkeys(list(load_weapon_lines()['value']) + list(alleged_weapon_dict)
+                                   + list(WEAPON_WEIGHTS)))
+    return spellings, [WEAPON_WEIGHTS.get(spelling, 1) for spelling in spellings]
+
+
+def _pick(rng, values, n, p=None):
+    if p is not None:
+        p = np.asarray(p, dtype='float64') / np.sum(p)
+    return np.array(values, dtype=object)[rng.choice(len(values), n, p=p)]
+
+
+def make_incidents(n_rows, seed=0, first_id=0):
+    """A raw-format incident table of n_rows rows, with IDs starting at first_id."""
+    rng = np.random.default_rng(seed)
+    population = state_population()
+    columns = {'victims_name': make_names(n_rows, seed).to_numpy(),
+               'victims_age': _pick(rng, AGES, n_rows)}
+
+    day = pd.Timestamp('2013-01-01') + pd.to_timedelta(rng.integers(0, 2556, n_rows), 'D')
+    columns['date'] = (day.month.astype(str) + '/' + day.day.astype(str) + '/' + day.year.astype(str)).to_numpy()
+    columns['state'] = _pick(rng, population.index, n_rows, (population / population.sum()).to_numpy())
+    columns['city'] = _pick(rng, CITIES, n_rows)
+    columns['zipcode'] = np.where(rng.random(n_rows) < 0.01, np.nan, rng.integers(1_000, 99_950, n_rows))
+    columns['street_address'] = np.where(rng.random(n_rows) < 0.03, None,
+                                         pd.Series(rng.integers(1, 9_999, n_rows)).astype(str) + ' Main St')
+    columns['agency_resp_for_death'] = _pick(rng, AGENCIES, n_rows)
+
+    # mixed case, like the raw column: 'Justified', 'justified', 'JUSTIFIED'
+    dispositions = _pick(rng, DISPOSITIONS, n_rows)
+    case = rng.random(n_rows)
+    dispositions[case < 0.1] = pd.Series(dispositions[case < 0.1]).str.lower().to_numpy()
+    dispositions[case > 0.95] = pd.Series(dispositions[case > 0.95]).str.upper().to_numpy()
+    columns['official_disposition_of_death'] = dispositions
+    weapons, weights = _weapons()
+    columns['alleged_weapon'] = _pick(rng, weapons, n_rows, weights)
+
+    for col, (values, p) in CHOICES.items():
+        columns[col] = _pick(rng, values, n_rows, p)
+    for col, fill in [('victim_img_url', 'https://example.com/victim.jpg'),
+                      ('news_article_link', 'https://example.com/article'),
+                      ('desc_of_circumstances', 'Officers responded to a call.'),
+                      ('county', 'County')]:
+        columns[col] = np.where(rng.random(n_rows) < 0.05, None, fill)
+    columns['WaPo_id'] = np.where(rng.random(n_rows) < 0.5, np.nan, rng.integers(1, 10_000, n_rows))
+    columns['ID'] = np.arange(first_id, first_id + n_rows)
+
+    incidents = pd.DataFrame(columns)
+    incidents.iloc[rng.random(n_rows) < 0.001] = None  # empty spreadsheet rows
+    return incidents[list(RAW_NAMES) + ['ID']].rename(columns=RAW_NAMES)
+
+
+def write_incidents(n_rows, path, seed=0, chunksize=CHUNKSIZE):
+    """Write an n_rows raw CSV to path, chunksize rows at a time."""
+    for number, start in enumerate(range(0, n_rows, chunksize)):
+        chunk = make_incidents(min(chunksize, n_rows - start), seed + number, first_id=start)
+        chunk.to_csv(path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+
+
+if __name__ == '__main__':
+    # python -m benchmarks.synthetic n_rows out.csv
+    write_incidents(int(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,10 @@
+"""The stopwatch every benchmark here uses."""
+
+import time
+
+
+def timed(func, *args, **kwargs):
+    """(func(*args, **kwargs), seconds it took)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -20,13 +20,20 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from nameparser import HumanName
 import webbrowser
+import sys
+sys.path.append('..')
+from cleaning.names import parse_names
+from cleaning.stage_cache import cached_call, enable_cache
+
+# read_csv and the name parsing are cached in ../.stage_cache, keyed on the input file and the code
+enable_cache()
 # %matplotlib inline
 
 # %% [markdown]
 # Import CSV file of data that needs cleaning and check its shape.
 
 # %%
-killings = pd.read_csv('./csv_files/police_killings_original.csv')
+killings = cached_call(pd.read_csv, './csv_files/police_killings_original.csv')
 killings.shape
 
 # %% [markdown]
@@ -105,11 +112,12 @@ killings.info()
 # ### Victim's name - splitting to first and last names
 
 # %%
-names_without_police_in_them = killings.loc[killings['victims_name'].str.contains('police')==False, 'victims_name']
+# Each distinct name is parsed once, and only the unusual ones go through HumanName
+names = parse_names(killings['victims_name'])
 
-killings['first_name'] = names_without_police_in_them.apply(lambda x: HumanName(x).first)
+killings['first_name'] = names['first_name']
 
-killings['last_name'] = names_without_police_in_them.apply(lambda x: HumanName(x).last)
+killings['last_name'] = names['last_name']
 
 # %%
 # killings[['First Name', 'Last Name']] = killings['victims_name'].loc[killings['victims_name'].str.split().str.len() == 2].str.split(expand=True)
@@ -149,32 +157,28 @@ null_gender_df
 # While reading through each article, it would be good to know which columns are Null in case we find that information in the article.  To do this, we'll determine which columns are null for each of the distinct rows, then read the article and impute any information we find.
 
 # %%
-null_gender_links = null_gender_df['news_article_link']
+from cleaning.worklist import research_worklist
 
-null_gender_idx = null_gender_links.index
-null_gender_urls = null_gender_links.to_list()
+# The null mask is computed once for the whole frame; most gaps first
+null_gender_worklist = research_worklist(killings, target='victims_gender')
 
 print("Here are the links for news articles that contain links for rows with a null gender:")
 print("-"*50)
 print()
-for idx, link in zip(null_gender_idx, null_gender_links):
-    null_col_mask = killings.loc[idx].isna()==True
-    print(F"df_idx: {idx}")
-    print(killings.loc[idx, null_col_mask].to_string())
-    print(F"link: {link}")
+for row in null_gender_worklist.itertuples(index=False):
+    print(F"df_idx: {row.row}")
+    print(F"null columns: {row.missing}")
+    print(F"link: {row.link}")
     print()
 
 # %%
-# news article says the victim was male, no age given
-killings.loc[13, 'victims_gender'] = 'male'
+from cleaning.corrections import apply_corrections, load_corrections
 
-# %%
-# news article says the victim was male in his 40s
-killings.loc[112, ['victims_gender', 'victims_age']] = 'male', '40'
-
-# %%
-# URL mentions male victim, but ad is behind paywall so can't investigate further
-killings.loc[1029, 'victims_gender'] = 'male'
+# Every value researched below (gender, age, city, county, geo_type, zipcode, street address) is a line
+# in corrections.csv with the research as its note, and they're all written here in one pass
+corrections = load_corrections()
+killings = apply_corrections(killings, corrections, source='./csv_files/police_killings_original.csv')
+corrections[corrections['column'].isin(['victims_gender', 'victims_age'])]
 
 # %%
 killings.loc[774]
@@ -182,11 +186,6 @@ killings.loc[774]
 # %%
 killings[(killings['victims_gender'].isnull()==True) & (killings['news_article_link'].isnull()==True)]
 
-# %%
-# Both names sound male, so I'll set the gender accordingly
-killings.loc[528, 'victims_gender'] = 'male'
-killings.loc[774, 'victims_gender'] = 'male'
-
 # %%
 num_null_gender = killings['victims_gender'].isnull().sum()
 print(F"There are only {num_null_gender} rows with a null gender left, so we'll impute 'Unknown'")
@@ -234,9 +233,7 @@ killings.loc[killings['city'].isnull()==True,['city', 'state', 'zipcode']]
 # Since we have a zipcode and state for several of these rows, we can look up the appropriate city
 
 # %%
-killings.loc[3339, 'city'] = "Land O' Lakes"
-killings.loc[5561, 'city'] = "Jacksonville"
-killings.loc[6511, 'city'] = "Douglas"
+corrections[corrections['column'] == 'city']
 
 # %% [markdown]
 # #### County
@@ -248,21 +245,7 @@ killings.loc[killings['county'].isnull()==True,['street_address', 'city', 'state
 # Since we have city and state information for these rows, we can look up the appropriate county
 
 # %%
-killings.loc[493,'county'] = 'Copiah'
-killings.loc[528,'county'] = 'Wyandotte'
-killings.loc[774,'county'] = 'Genesee'
-killings.loc[1250,'county'] = 'Pratt'
-killings.loc[1305,'county'] = 'Gadsden'
-killings.loc[1322,'county'] = 'Hunt'
-killings.loc[1336,'county'] = 'Utah'
-killings.loc[1346,'county'] = 'Milwaukee'
-killings.loc[1356,'county'] = 'Pemiscot'
-killings.loc[1367,'county'] = 'Loudon'
-killings.loc[1430,'county'] = 'Pierce'
-killings.loc[1607,'county'] = 'Caldwell'
-killings.loc[1965,'county'] = 'Maricopa'
-killings.loc[1981,'county'] = 'Daviess'
-killings.loc[3315,'county'] = 'Lake'
+corrections[corrections['column'] == 'county']
 
 # %% [markdown]
 # #### Geography Type/Zipcode/Street Address
@@ -286,203 +269,14 @@ killings.loc[(killings['geo_type'].isnull()==True) & (killings['street_address']
 # [Source for geo_type classifications](http://jedkolko.com/wp-content/uploads/2015/05/Data-and-methodological-details-052715.pdf)
 
 # %%
-killings.loc[522, 'geo_type'] = 'Suburban' #82540 households / 62.42 sq mi = 1322 households / sq mi (suburban)
-
-# %%
-killings.loc[595, 'geo_type'] = 'Suburban' #521198 households / 385.8 sq mi = 1351 households / sq mi (suburban)
-
-# %%
-killings.loc[1000, 'geo_type'] = 'Rural'
-
-# %%
-killings.loc[1004, 'geo_type'] = 'Rural'
-
-# %%
-killings.loc[1281, 'geo_type'] = 'Suburban' # 156,482 households / 156.6 sq. mi = 999 households / sq mi (suburban)
-
-# %%
-killings.loc[1947, 'geo_type'] = 'Suburban' # 48095 households / 108.3 sq. mi = 444 households / sq mi (suburban)
-
-# %%
-killings.loc[2072, 'geo_type'] = 'Suburban' # 33 households / .22 sq. mi = 150 households / sq mi (suburban, but just barely)
-
-# %%
-killings.loc[2207, 'geo_type'] = 'Suburban' # 321835 households / 181.4 sq. mi = 1774 households / sq mi (suburban, almost urban)
-
-# %%
-killings.loc[2419, 'geo_type'] = 'Urban' # 130885 households / 22.78 sq. mi = 5745 households / sq mi (urban)
-
-# %%
-killings.loc[2488, 'geo_type'] = 'Suburban' # 23 households / .14 sq. mi = 164 households / sq mi (Suburban, just barely)
-
-# %%
-killings.loc[3315, 'geo_type'] = 'Suburban' # 7013 households / 5.598 sq. mi = 1263 households / sq mi (suburban)
-
-# %%
-killings.loc[3347, 'geo_type'] = 'Suburban' # 3203 households / 7.14 sq. mi = 449 households / sq mi (Suburban)
-
-# %%
-killings.loc[3581, 'geo_type'] = 'Suburban' # 125894 households / 740 sq. mi = 170 households / sq mi (Suburban)
+corrections[corrections['column'].isin(['geo_type', 'zipcode', 'street_address'])]
 
 # %% [markdown]
 # The next location is at Foxwoods Casino in CT, which is technically part of Mashantucket CT., I think because it's considered an indian reservation.  The casino is surrounded by Ledyard CT. and it might be a better idea to use that city as it may be more representative of the household popluation size and square mileage need to classify the geo_type.
 
-# %%
-killings.loc[3621, 'geo_type'] = 'Rural' # 62 households / 2.6 sq. mi = 24 households / sq mi (Rural)
-
-# %%
-killings.loc[3699, 'geo_type'] = 'Rural' # 115 households / 1.5 sq. mi = 77 households / sq mi (Rural)
-
-# %%
-killings.loc[3740, 'geo_type'] = 'Suburban' # 521198 households / 385.8 sq. mi = 1351 households / sq mi (Suburban)
-
-# %%
-killings.loc[4409, ['geo_type', 'zipcode']] = 'Suburban', 32218.0 #359607 households / 875 sq mi = 411 (Suburban)
-
-# %%
-killings.loc[4535, ['geo_type', 'zipcode']] = 'Suburban', 46368.0 #13992 households / 27.61 sq mi = 507 (Suburban)
-
-# %%
-killings.loc[4571, ['geo_type', 'zipcode']] = 'Suburban', 97210.0 #264428 households / 145 sq mi = 1824 (Suburban)
-
-# %%
-killings.loc[[4592, 4593], ['geo_type', 'zipcode']] = 'Suburban', 77014.0 #848340 households / 669 sq mi = 1268 (Suburban)
-
-# %%
-killings.loc[4594, ['geo_type', 'zipcode']] = 'Suburban', 74434.0 #1639 households / 14.13 sq mi = 116 (Suburban)
-
-# %%
-killings.loc[4640, ['geo_type', 'zipcode']] = 'Suburban', 30680.0 #5337 households / 14.15 sq mi = 377 (Suburban)
-
-# %%
-killings.loc[5021, 'geo_type'] = 'Rural' # 268 households / 8.842 sq. mi = 30 households / sq mi (Rural)
-
-# %%
-killings.loc[5164, ['geo_type', 'street_address']] = 'Rural', '182 N 4430 Rd' # No census data on household population, but on Google maps it looks very rural
-
-# %%
-killings.loc[5192, 'geo_type'] = 'Suburban' # 39122 households / 22.99 sq. mi = 1702 households / sq mi (Suburban)
-
-# %%
-killings.loc[5268, 'geo_type'] = 'Suburban' # 355 households / 0.74 sq. mi = 480 households / sq mi (Suburban)
-
-# %%
-killings.loc[5371, ['geo_type', 'zipcode']] = 'Suburban', 77073.0 #848340 households / 669 sq mi = 1268 (Suburban)
-
-# %%
-killings.loc[5623, 'geo_type'] = 'Suburban' # 63217 households / 103.1 sq. mi = 613 households / sq mi (Suburban)
-
-# %%
-killings.loc[5709, 'geo_type'] = 'Rural' # Jean is just outside of Las Vegas.  Has no residents but is considered a commercial town.  Seems rural enough.
-
-# %%
-killings.loc[5805, 'geo_type'] = 'Suburban' # 3061 households / 13.13 sq. mi = 233 households / sq mi (Suburban)
-
-# %%
-killings.loc[[4451, 6080], 'geo_type'] = 'Urban' # 323446 households / 142.5 sq. mi = 2270 households / sq mi (Urban)
-
-# %%
-killings.loc[6188, 'geo_type'] = 'Urban' # 7229 households / 0.648 sq. mi = 11156 households / sq mi (Urban)\
-
-# %%
-killings.loc[6570, ['street_address', 'zipcode', 'geo_type']] = '12097 Veterans Memorial Dr', 77067.0, 'Suburban' #848340 households / 669 sq mi = 1268 (Suburban)
-
-# %%
-killings.loc[6442, 'geo_type'] = 'Rural' # Outskirts of Las Vegas, seems very Rural
-
-# %%
-killings.loc[6573, ['geo_type', 'zipcode', 'city']] = 'Suburban', 73104.0, 'Oklahoma City' # 240471 / 621 = 387 (Suburban)
-
-# %%
-killings.loc[6637, ['geo_type', 'zipcode']] = 'Suburban', 70767.0 # 2162 / 3.328 = 650 (Suburban)
-
-# %%
-killings.loc[6643, ['street_address', 'zipcode', 'geo_type']] = '32000 Westport Way', 92596.0, 'Suburban' # 8539 / 10.9 = 783 (Suburban)
-
-# %%
-killings.loc[6697, ['street_address', 'geo_type']] = '2335 Union Dr', 'Suburban' # 25243 / 224.27 = 113 (Suburban)
-
-# %%
-killings.loc[6746, 'geo_type'] = 'Suburban' # 199478 / 136.8 = 1458 (Suburban)
-
-# %%
-killings.loc[6848, 'geo_type'] = 'Urban' # 281322 / 68.34 = 4117 (Urban)
-
-# %%
-killings.loc[6862, ['zipcode', 'geo_type']] = 15224.0, 'Urban' # 136275 / 58.34 = 2336
-
-# %%
-killings.loc[6933, 'geo_type'] = 'Suburban' # 113901 / 108 = 1055 (Suburban)
-
 # %%
 killings.loc[killings['geo_type'].isnull()==True, ['street_address', 'city', 'state', 'zipcode', 'geo_type', 'news_article_link']]
 
-# %%
-killings.loc[528, 'geo_type'] = 'Suburban' # 53925 / 128.4 = 420 (Suburban)
-
-# %%
-killings.loc[774, 'geo_type'] = 'Suburban' # 40035 / 34.11 = 1174 (Suburban)
-
-# %%
-killings.loc[1029, 'geo_type'] = 'Suburban' # 682 / 3.14 = 217 (Suburban)
-
-# %%
-killings.loc[1250, ['street_address', 'zipcode', 'geo_type']] = '500 N Main St', 67124.0, 'Suburban' # 2837 / 7.49 = 379 (Suburban)
-
-# %%
-killings.loc[1305, 'geo_type'] = 'Suburban' # 2810 / 11.54 = 244 (Suburban)
-
-# %%
-killings.loc[1322, 'geo_type'] = 'Suburban' # 574 / 1.324 = 434 (Suburban)
-
-# %%
-killings.loc[1336, 'geo_type'] = 'Suburban' # 28177 / 18.57 = 1517 (Suburban)
-
-# %%
-killings.loc[1346, 'geo_type'] = 'Urban' # 229556 / 96.81 = 2371 (Urban)
-
-# %%
-killings.loc[1356, 'geo_type'] = 'Suburban' # 1258 / 2.31 = 545 (Suburban)
-
-# %%
-killings.loc[1367, 'geo_type'] = 'Rural' # 394 / 8.452 = 47 (Rural)
-
-# %%
-killings.loc[1430, 'geo_type'] = 'Suburban' # 10780 / 8.687 = 1241 (Suburban)
-
-# %%
-killings.loc[1607, 'geo_type'] = 'Suburban' # 23121 / 19.7 = 1174 (Suburban)
-
-# %%
-killings.loc[1812, ['geo_type']] = 'Rural' # 32 / .4 = 80 (Rural)
-
-# %%
-killings.loc[1965, 'geo_type'] = 'Suburban' # 111221 / 184.4 = 603 (Suburban)
-
-# %%
-killings.loc[1981, 'geo_type'] = 'Suburban' # 118 / 1.05 = 112 (Suburban)
-
-# %%
-killings.loc[2813, ['street_address', 'zipcode', 'geo_type']] = '6800 62nd Ave NE', 98115.0, 'Urban' # 283510 / 83.78 = 3384 (Urban)
-
-# %%
-killings.loc[3344, ['city', 'zipcode', 'geo_type']] = 'Campbellton', 78008.0, 'Rural' # 176 / 198.5 = 1 (Rural)
-
-# %%
-killings.loc[3346, ['zipcode', 'geo_type']] = 57752.0, 'Rural' # 177 / 2.008 = 88 (Rural)
-
-# %%
-killings.loc[3475, ['street_address', 'zipcode', 'geo_type', 'city']] = 'X4 Rd', 81411.0, 'Rural', 'Bedrock' #Out in the middle of nowhere
-
-# %%
-killings.loc[6812, 'geo_type'] = 'Suburban' # 4034 / 17.1 = 236 (Suburban)
-
-# %%
-killings.loc[7099, 'geo_type'] = 'Urban' # 870051 / 55.25 = 15748 (Urban)
-
-# %%
-killings.loc[7461, 'geo_type'] = 'Suburban' # 8689 / 4.36 = 1993 (Suburban)
-
 # %% [markdown]
 # #### Handling location fields that are still Null
 # Since we've done as much as we can in the way of researching location data, we'll replace all null values that remain with 'unknown'
@@ -821,13 +615,20 @@ killings["victims_age"] = killings["victims_age"].astype('float64')
 # We can convert the dates in the date column to Python datetime objects
 
 # %%
-killings["date"] = pd.to_datetime(killings["date"], infer_datetime_format=True)
+from cleaning.dates import parse_dates
+
+# Each layout that occurs is parsed with its own format, once per distinct date string
+killings["date"], unparsed = parse_dates(killings["date"])
+print(F"{len(unparsed)} dates couldn't be parsed and were left as NaT")
+unparsed
 
 # %% [markdown]
-# # Saving work to CSV file
+# # Saving work to CSV and Parquet files
+# The Parquet copy keeps the dtypes (categories, dates, nullable zipcodes) so the EDA notebook can load it without re-parsing anything.
 
 # %%
 killings.to_csv('./csv_files/police_killings_clean.csv', index=False)
+killings.to_parquet('./csv_files/police_killings_clean.parquet', index=False)
 
 # %% [markdown]
 # # Scratch Work
@@ -0,0 +1,5 @@
+"""Importable version of the police killings cleaning notebook."""
+
+from .pipeline import clean_killings, read_killings, save_killings
+
+__all__ = ["clean_killings", "read_killings", "save_killings"]
@@ -0,0 +1,49 @@
+"""
+Helpers for running the notebook's column rewrites on categorical columns.
+
+Each helper also accepts plain object/string columns, so the cleaning stages
+don't have to care which dtype a column was read with.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def transform(col, func):
+    """
+    Apply func (Series -> Series) to col.  For categoricals func only sees the
+    categories, and the result is broadcast back through the category codes.
+    """
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        return func(col)
+
+    new_labels = func(pd.Series(col.cat.categories, dtype=object))
+    new_codes, new_categories = pd.factorize(new_labels)
+    old_codes = col.cat.codes.to_numpy()
+    codes = np.full(len(old_codes), -1, dtype=new_codes.dtype)
+    present = old_codes >= 0
+    codes[present] = new_codes[old_codes[present]]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=new_categories),
+                     index=col.index, name=col.name)
+
+
+def replace_values(col, mapping):
+    """Same as col.map(mapping).fillna(col), but once per category for categoricals."""
+    return transform(col, lambda s: s.map(mapping).fillna(s))
+
+
+def fill_missing(col, value):
+    """fillna that also works when value isn't one of the categories yet."""
+    if isinstance(col.dtype, pd.CategoricalDtype) and value not in col.cat.categories:
+        col = col.cat.add_categories([value])
+    return col.fillna(value)
+
+
+def tidy_categories(frame):
+    """Drop unused categories and sort the rest, so the dtype only depends on the values."""
+    for col in frame.columns:
+        column = frame[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.cat.remove_unused_categories()
+            frame[col] = column.cat.reorder_categories(sorted(column.cat.categories))
+    return frame
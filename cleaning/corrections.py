@@ -0,0 +1,134 @@
+"""
+Hand research fixes (corrections.csv) applied in one pass.
+
+Each line of corrections.csv is one researched value:
+
+    source_row, victims_name, date, state, source_sha256, column, value, note
+
+victims_name/date/state (as they appear in the raw CSV) identify the incident,
+so a fix still lands on the right row when the source file is re-sorted or
+new incidents are added.  source_row is the df index the notebook used, which
+only means something in the file it was read from, so a line without a key
+is applied by position only when apply_corrections() is given that file as
+source and its sha256 is the line's source_sha256.  Everywhere else (the
+pipeline, merged feeds, synthetic data) such lines are skipped and counted.
+
+    python -m cleaning.corrections ./cleaning/csv_files/police_killings_original.csv
+
+fills in the keys from the original file and records its sha256 for the
+lines that can't be keyed (a missing name, or two incidents with the same
+name, date and state).
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .stage_cache import file_digest
+
+CORRECTIONS_PATH = Path(__file__).with_name('corrections.csv')
+
+KEY_COLUMNS = ['victims_name', 'date', 'state']
+
+
+def load_corrections(path=CORRECTIONS_PATH):
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''])
+
+
+def _record_keys(frame):
+    return pd.MultiIndex.from_frame(frame[KEY_COLUMNS].astype(object))
+
+
+def match_rows(killings, corrections, source=None):
+    """
+    Position in killings for every correction: -1 if it matches no row, -2
+    for a line without a key that isn't for source (see the module docstring).
+    """
+    positions = np.full(len(corrections), -1, dtype=np.int64)
+
+    keyed = corrections[KEY_COLUMNS].notna().all(axis=1).to_numpy()
+    if keyed.any():
+        # hash join on (name, date, state); duplicated keys in killings keep the first row
+        keys = _record_keys(killings)
+        first_rows = ~keys.duplicated()
+        lookup = pd.Series(np.flatnonzero(first_rows), index=keys[first_rows])
+        positions[keyed] = lookup.reindex(_record_keys(corrections[keyed])).fillna(-1).to_numpy(np.int64)
+
+    digest = file_digest(source) if source is not None else None
+    by_position = ~keyed & (corrections['source_sha256'] == digest).to_numpy()
+    positions[~keyed] = -2
+    if by_position.any():
+        source_rows = pd.to_numeric(corrections.loc[by_position, 'source_row']).to_numpy()
+        positions[by_position] = killings.index.get_indexer(source_rows)
+    return positions
+
+
+def _cast(values, column):
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        return pd.to_numeric(values).astype(column.dtype)
+    return values
+
+
+def apply_corrections(killings, corrections=None, source=None, verbose=True):
+    """
+    Write every correction into killings with one vectorized assignment per
+    column.  source is the raw CSV killings was read from; lines without a
+    key are only applied when it's the file they were researched in.
+    """
+    if corrections is None:
+        corrections = load_corrections()
+
+    positions = match_rows(killings, corrections, source)
+    matched = positions >= 0
+    fixes = corrections.loc[matched, ['column', 'value']].assign(position=positions[matched])
+    # when a cell is corrected twice the later line wins, like the notebook cells did
+    fixes = fixes.drop_duplicates(['position', 'column'], keep='last')
+
+    for col, group in fixes.groupby('column', sort=False):
+        column = killings[col]
+        values = _cast(group['value'].reset_index(drop=True), column)
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            new_categories = pd.Index(values.unique()).difference(column.cat.categories)
+            column = column.cat.add_categories(new_categories)
+        column = column.copy()
+        column.iloc[group['position'].to_numpy()] = values.to_numpy()
+        killings[col] = column
+
+    if verbose:
+        skipped = (positions == -2).sum()
+        print(F"Applied {matched.sum()} corrections, {(positions == -1).sum()} orphaned (no matching row)"
+              + (F", {skipped} without a key skipped (not for this file)" if skipped else ''))
+    return killings
+
+
+def rekey_corrections(raw_killings, source, corrections=None):
+    """
+    Fill in victims_name/date/state for corrections that only have a
+    source_row, using the renamed raw frame the notebook indexes into, read
+    from the file at source.  Rows whose key is incomplete or shared with
+    another row stay unkeyed, with source's sha256 recorded instead.
+    """
+    if corrections is None:
+        corrections = load_corrections()
+    corrections = corrections.copy()
+    unkeyed = corrections[KEY_COLUMNS].isna().any(axis=1)
+    source_rows = pd.to_numeric(corrections.loc[unkeyed, 'source_row'])
+    raw_keys = raw_killings[KEY_COLUMNS].astype(object)
+    usable = raw_keys.notna().all(axis=1) & ~raw_keys.duplicated(keep=False)
+    keys = raw_keys.where(usable, np.nan).reindex(source_rows.to_numpy())
+    corrections.loc[unkeyed, KEY_COLUMNS] = keys.to_numpy()
+    still_unkeyed = corrections[KEY_COLUMNS].isna().any(axis=1)
+    corrections.loc[still_unkeyed, KEY_COLUMNS] = np.nan
+    corrections.loc[still_unkeyed, 'source_sha256'] = file_digest(source)
+    return corrections
+
+
+if __name__ == '__main__':
+    # python -m cleaning.corrections ./cleaning/csv_files/police_killings_original.csv
+    import sys
+
+    from .pipeline import drop_empty, read_killings
+
+    raw = drop_empty(read_killings(sys.argv[1]))
+    rekey_corrections(raw, sys.argv[1]).to_csv(CORRECTIONS_PATH, index=False)
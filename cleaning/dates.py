@@ -0,0 +1,67 @@
+"""
+Date parsing with explicit formats.
+
+pd.to_datetime(..., infer_datetime_format=True) guesses a format from the
+data (and the flag is deprecated).  parse_dates() instead checks which of
+the layouts below actually occur, parses each one with its own format, and
+only parses each distinct string once; there are a few thousand distinct days
+no matter how many rows there are.  Strings that don't fit any layout (or fit
+one but aren't real dates, like 2/30/2015) are reported instead of quietly
+becoming NaT.
+"""
+
+import numpy as np
+import pandas as pd
+
+# (regex for the layout, format to parse it with)
+DATE_LAYOUTS = [
+    (r'^\d{1,2}/\d{1,2}/\d{4}$', '%m/%d/%Y'),  # the raw spreadsheet: 1/5/2013
+    (r'^\d{1,2}/\d{1,2}/\d{2}$', '%m/%d/%y'),
+    (r'^\d{1,2}-\d{1,2}-\d{4}$', '%m-%d-%Y'),
+    (r'^\d{4}-\d{2}-\d{2}$', '%Y-%m-%d'),  # what to_csv writes for the clean file
+    (r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?$', 'ISO8601'),
+    (r'^[A-Za-z]{3} \d{1,2}, \d{4}$', '%b %d, %Y'),
+    (r'^[A-Za-z]{4,} \d{1,2}, \d{4}$', '%B %d, %Y'),
+]
+
+
+def _layout_masks(stripped):
+    """{format: mask of the values in that layout} for the layouts that occur; first match wins."""
+    unmatched = np.ones(len(stripped), dtype=bool)
+    masks = {}
+    for pattern, date_format in DATE_LAYOUTS:
+        in_layout = stripped.str.match(pattern, na=False).to_numpy() & unmatched
+        if in_layout.any():
+            masks[date_format] = in_layout
+            unmatched &= ~in_layout
+    return masks
+
+
+def detect_layouts(values):
+    """{format: number of values in that layout} for the layouts that occur."""
+    values = pd.Series(values, dtype=object).str.strip()
+    return {date_format: int(in_layout.sum()) for date_format, in_layout in _layout_masks(values).items()}
+
+
+def parse_dates(col):
+    """
+    Parse col into datetime64[ns].  Returns (dates, unparsed) where unparsed
+    holds the original strings of the non-null rows that couldn't be parsed.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes, uniques = col.cat.codes.to_numpy(), pd.Series(col.cat.categories, dtype=object)
+    else:
+        codes, uniques = pd.factorize(col)
+        uniques = pd.Series(uniques, dtype=object)
+    stripped = uniques.astype(str).str.strip()
+
+    parsed = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[ns]')
+    for date_format, in_layout in _layout_masks(stripped).items():
+        values = pd.to_datetime(stripped[in_layout], format=date_format, errors='coerce')
+        parsed[in_layout] = values.to_numpy(dtype='datetime64[ns]')
+
+    # code -1 (missing) picks up the NaT appended at the end
+    parsed = np.append(parsed, np.datetime64('NaT'))
+    dates = pd.Series(parsed[codes], index=col.index, name=col.name)
+    unparsed = col[dates.isna() & col.notna()]
+    return dates, unparsed
@@ -0,0 +1,92 @@
+"""
+Filling in missing geo_type values from zipcode household density.
+
+The geo_type section of the notebook looks up households and land area for
+each missing row by hand and does the division in a comment, e.g.
+"#82540 households / 62.42 sq mi = 1322 households / sq mi (suburban)".
+The dataset's own geo_type comes from the Trulia/Kolko classification of
+ZCTAs by household density:
+
+- urban: households per square mile >= 2213.2
+- suburban: households per square mile >= 101.6 and < 2213.2
+- rural: households per square mile < 101.6
+
+fill_geo_types() does the same for every missing geo_type with a zipcode,
+from a local ZCTA table (zcta_households.csv: zcta, households, land_sq_mi,
+e.g. ACS table B11001 joined with ALAND_SQMI from the census Gazetteer
+file).  The table is loaded once into sorted arrays, so the lookup is a
+np.searchsorted and the classification another one against the thresholds.
+Without the file the stage does nothing and the rows stay 'unknown'.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ZCTA_CSV = Path(__file__).resolve().parent / 'zcta_households.csv'
+
+# households per square mile; GEO_TYPES[i] covers THRESHOLDS[i-1] <= density < THRESHOLDS[i]
+THRESHOLDS = np.array([101.6, 2213.2])
+GEO_TYPES = np.array(['Rural', 'Suburban', 'Urban'], dtype=object)
+
+
+@lru_cache(maxsize=None)
+def _zcta_table(path, mtime):
+    table = pd.read_csv(path, usecols=['zcta', 'households', 'land_sq_mi'], dtype={'zcta': 'int64'})
+    table = table[table['land_sq_mi'] > 0].sort_values('zcta').drop_duplicates('zcta')
+    density = (table['households'] / table['land_sq_mi']).to_numpy(dtype='float64')
+    zctas = table['zcta'].to_numpy()
+    zctas.flags.writeable = density.flags.writeable = False
+    return zctas, density
+
+
+def load_zcta_table(path=ZCTA_CSV):
+    """(sorted zcta array, households per sq mi array), or None if there's no table."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return _zcta_table(str(path), path.stat().st_mtime)
+
+
+def classify_density(density):
+    """'Rural' / 'Suburban' / 'Urban' for each households-per-sq-mi value, NaN where density is NaN."""
+    density = np.asarray(density, dtype='float64')
+    labels = GEO_TYPES[np.searchsorted(THRESHOLDS, density, side='right')]
+    labels[np.isnan(density)] = np.nan
+    return labels
+
+
+def zipcode_density(zipcodes, table):
+    """Households per sq mi for each zipcode, NaN for missing zipcodes or ones not in table."""
+    zctas, density = table
+    zipcodes = pd.Series(zipcodes).astype('float64').to_numpy()
+    result = np.full(len(zipcodes), np.nan)
+    if not len(zctas):
+        return result
+    known = ~np.isnan(zipcodes)
+    keys = np.where(known, zipcodes, -1).astype('int64')
+    pos = np.minimum(np.searchsorted(zctas, keys), len(zctas) - 1)
+    found = known & (zctas[pos] == keys)
+    result[found] = density[pos[found]]
+    return result
+
+
+def fill_geo_types(killings, table=None):
+    """Classify missing geo_types from the zipcode's household density."""
+    table = load_zcta_table() if table is None else table
+    if table is None:
+        return killings
+    missing = killings['geo_type'].isna().to_numpy()
+    labels = classify_density(zipcode_density(killings.loc[missing, 'zipcode'], table))
+    filled = pd.notna(labels)
+    if filled.any():
+        print(F"Filled {filled.sum()} of {missing.sum()} missing geo_types from zipcode household density")
+        geo_type = killings['geo_type'].copy()
+        if isinstance(geo_type.dtype, pd.CategoricalDtype):
+            new = sorted(set(labels[filled]) - set(geo_type.cat.categories))
+            geo_type = geo_type.cat.add_categories(new)
+        geo_type.iloc[np.flatnonzero(missing)[filled]] = labels[filled]
+        killings['geo_type'] = geo_type
+    return killings
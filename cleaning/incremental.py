@@ -0,0 +1,111 @@
+"""
+Incremental cleaning: only re-run the pipeline on raw rows that changed.
+
+The upstream spreadsheet is append-mostly, so on a daily refresh almost every
+row is exactly what we cleaned last time.  clean_incremental() hashes each raw
+row, keeps the cleaned rows whose (df index, row hash) match the previous run,
+runs the stages on everything else and merges the two.
+
+The previous run lives in a state directory:
+
+    state/clean.parquet   clean rows, indexed like the raw file, plus _row_hash
+    state/meta.json       what the clean rows depend on besides the raw rows
+
+If anything in meta.json changed (the cleaning code, corrections.csv, the
+weapon spelling mapping for the whole file, or the set of columns that survive
+drop_empty) the whole file is rebuilt, so the result is always the same as
+clean_killings() on the same raw file.
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .categorical import tidy_categories
+from .corrections import CORRECTIONS_PATH
+from .geo_types import ZCTA_CSV
+from .pipeline import STAGES, drop_empty, file_weapon_mapping, read_killings, run_stages, with_weapon_mapping
+
+HASH_COLUMN = '_row_hash'
+
+
+def hash_rows(raw):
+    """One uint64 per row, from the row's values only (not its position)."""
+    return pd.util.hash_pandas_object(raw, index=False)
+
+
+def _file_digest(paths):
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def _meta(killings, weapons):
+    code = Path(__file__).parent.glob('*.py')
+    return {'code': _file_digest(code),
+            'corrections': _file_digest([CORRECTIONS_PATH]),
+            'zcta': _file_digest([ZCTA_CSV]) if ZCTA_CSV.exists() else None,
+            'weapons': hashlib.sha256(weapons.to_csv().encode()).hexdigest(),
+            'columns': list(killings.columns)}
+
+
+def load_state(state_dir):
+    state_dir = Path(state_dir)
+    if not (state_dir / 'meta.json').exists():
+        return None, None
+    meta = json.loads((state_dir / 'meta.json').read_text())
+    clean = pd.read_parquet(state_dir / 'clean.parquet')
+    # Parquet hands object columns back with None where the cleaner left NaN
+    for col in clean.columns[(clean.dtypes == object).to_numpy()]:
+        clean[col] = clean[col].where(clean[col].notna(), np.nan)
+    return clean, meta
+
+
+def save_state(state_dir, clean, hashes, meta):
+    state_dir = Path(state_dir)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    clean.assign(**{HASH_COLUMN: hashes}).to_parquet(state_dir / 'clean.parquet', index=True)
+    (state_dir / 'meta.json').write_text(json.dumps(meta, indent=1))
+
+
+def clean_incremental(path, state_dir, verbose=True):
+    """Clean the raw CSV at path, reusing rows cleaned by the last run saved in state_dir."""
+    killings = drop_empty(read_killings(path))
+    hashes = hash_rows(killings)
+    # the spellings are folded over the whole file, so the changed rows fold like a full rebuild would
+    weapons = file_weapon_mapping(killings['alleged_weapon'].value_counts())
+    meta = _meta(killings, weapons)
+    previous, previous_meta = load_state(state_dir)
+
+    if previous is None or previous_meta != meta:
+        reused = pd.Index([], dtype=killings.index.dtype)
+    else:
+        previous_hashes = previous[HASH_COLUMN].reindex(killings.index)
+        reused = killings.index[(previous_hashes == hashes).to_numpy()]
+
+    changed = killings.index.difference(reused)
+    if verbose:
+        print(F"Reusing {len(reused)} clean rows, cleaning {len(changed)} new or changed rows")
+
+    # drop_empty already ran on the whole file, so the columns match a full rebuild
+    cleaned = run_stages(killings.loc[changed], with_weapon_mapping(STAGES[1:], weapons))
+    if len(reused):
+        carried = previous.loc[reused].drop(columns=HASH_COLUMN)
+        categorical = [col for col in cleaned.columns if isinstance(cleaned[col].dtype, pd.CategoricalDtype)]
+        # concat decides dtypes differently when one side is empty, so only concat when both have rows
+        cleaned = pd.concat([carried, cleaned]) if len(changed) else carried
+        cleaned = cleaned.loc[killings.index]
+        cleaned = tidy_categories(cleaned.astype({col: 'category' for col in categorical}))
+
+    save_state(state_dir, cleaned, hashes, meta)
+    return cleaned
+
+
+if __name__ == '__main__':
+    # python -m cleaning.incremental ./cleaning/csv_files/police_killings_original.csv ./cleaning/csv_files/state
+    clean_incremental(sys.argv[1], sys.argv[2])
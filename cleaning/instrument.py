@@ -0,0 +1,136 @@
+"""
+Optional per-stage timing and memory records for the cleaning pipeline.
+
+run_stages() and clean_killings() take a recorder.  Without one they just call
+the stages; with one each stage goes through StageRecorder.run(), which notes
+its group (STAGE_GROUPS in pipeline.py: "victim name", "geo_type fixes",
+"official disposition", "type conversion", ...), wall and CPU time, memory and
+rows in and out:
+
+    recorder = StageRecorder()
+    killings = clean_killings('./csv_files/police_killings_original.csv', recorder=recorder)
+    recorder.group_summary()
+    recorder.write_trace('clean_trace.json')  # open in chrome://tracing or ui.perfetto.dev
+
+Memory is the growth in the process's peak RSS during the stage by default,
+which costs one getrusage() call per stage.  memory='tracemalloc' gives the
+peak Python allocation above what was allocated when the stage started, at
+the price of running the stage under tracemalloc (several times slower).
+
+    python -m cleaning.instrument raw.csv trace.json
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+MEMORY_MODES = ('rss', 'tracemalloc', None)
+
+
+def _rows(frame):
+    return len(frame) if isinstance(frame, pd.DataFrame) else None
+
+
+def _peak_rss():
+    """Peak resident set size of this process in bytes, or None where getrusage isn't available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB on Linux
+
+
+class StageRecorder:
+    """Collects one record per stage run; the same recorder can be reused across chunks or runs."""
+
+    def __init__(self, memory='rss'):
+        if memory not in MEMORY_MODES:
+            raise ValueError(F"memory must be one of {MEMORY_MODES}, not {memory!r}")
+        self.memory = memory
+        self.records = []
+        self.origin = time.perf_counter()
+
+    def run(self, stage, killings, group=None, name=None):
+        """Call stage(killings), record it and return its result."""
+        started_tracing = self.memory == 'tracemalloc' and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.memory == 'tracemalloc':
+            allocated, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        elif self.memory == 'rss':
+            rss_before = _peak_rss()
+
+        rows_in = _rows(killings)  # None for the load, which starts from a path
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            result = stage(killings)
+        finally:
+            wall, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+            memory = None
+            if self.memory == 'tracemalloc':
+                memory = tracemalloc.get_traced_memory()[1] - allocated
+                if started_tracing:
+                    tracemalloc.stop()
+            elif self.memory == 'rss' and rss_before is not None:
+                memory = _peak_rss() - rss_before
+
+        name = name or getattr(stage, '__name__', repr(stage))
+        self.records.append({'group': group or name, 'stage': name, 'start': start - self.origin,
+                             'wall': wall, 'cpu': cpu, 'memory': memory,
+                             'rows_in': rows_in, 'rows_out': _rows(result)})
+        return result
+
+    def summary(self):
+        """One row per stage run, in the order they ran."""
+        return pd.DataFrame(self.records, columns=['group', 'stage', 'start', 'wall', 'cpu', 'memory',
+                                                   'rows_in', 'rows_out'])
+
+    def group_summary(self):
+        """Totals per group (summed over chunks if the recorder saw several), slowest first."""
+        summary = self.summary()
+        # a group's rows in are its first stage's, its rows out its last stage's
+        stages = summary.groupby('group', sort=False)['stage']
+        summary['rows_in'] = summary['rows_in'].where(summary['stage'] == stages.transform('first'))
+        summary['rows_out'] = summary['rows_out'].where(summary['stage'] == stages.transform('last'))
+        return (summary.groupby('group', sort=False)
+                .agg(runs=('stage', 'size'), wall=('wall', 'sum'), cpu=('cpu', 'sum'), memory=('memory', 'max'),
+                     rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+                     rows_out=('rows_out', lambda rows: rows.sum(min_count=1)))
+                .sort_values('wall', ascending=False))
+
+    def trace_events(self):
+        """The records as Chrome trace "complete" events, each stage nested under its group."""
+        events = []
+        group_event = None
+        for record in self.records:
+            ts, dur = record['start'] * 1e6, record['wall'] * 1e6
+            if group_event is None or group_event['name'] != record['group']:
+                group_event = {'name': record['group'], 'cat': 'group', 'ph': 'X', 'ts': ts, 'dur': 0,
+                               'pid': 0, 'tid': 0}
+                events.append(group_event)
+            group_event['dur'] = ts + dur - group_event['ts']
+            args = {key: record[key] for key in ['cpu', 'memory', 'rows_in', 'rows_out']}
+            events.append({'name': record['stage'], 'cat': 'stage', 'ph': 'X', 'ts': ts, 'dur': dur,
+                           'pid': 0, 'tid': 0, 'args': args})
+        return events
+
+    def write_trace(self, path):
+        """Write a Chrome trace (chrome://tracing, ui.perfetto.dev) with the summary records alongside."""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(), 'records': self.records}, f, indent=1)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    # python -m cleaning.instrument raw.csv trace.json [rss|tracemalloc]
+    from .pipeline import clean_killings
+
+    recorder = StageRecorder(sys.argv[3] if len(sys.argv) > 3 else 'rss')
+    clean_killings(sys.argv[1], recorder=recorder)
+    recorder.write_trace(sys.argv[2])
+    print(recorder.group_summary().to_string())
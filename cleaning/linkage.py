@@ -0,0 +1,142 @@
+"""
+Finding the same incident reported more than once.
+
+The clean table's only identity is the DataFrame index (WaPo_id and ID are
+dropped), so once it's combined with the Washington Post data or another feed
+the same killing can show up several times with a slightly different name
+spelling, date or address.  link_incidents() gives every row an incident_id
+shared by all the rows that look like the same incident:
+
+    combined = pd.concat([killings, other_feed], ignore_index=True)
+    combined = link_incidents(combined)
+
+Rows are only compared with rows in the same state whose dates are within
+DAYS of each other.  The rows are sorted on (state, date) and each row's
+partners are found with one searchsorted, so the work grows with the number
+of rows (times the handful of incidents per state per week), not with every
+pair.  Each candidate pair is scored on first_name, last_name, victims_age,
+city and how far apart the dates are, and the pairs that score at least
+THRESHOLD are joined into clusters.
+
+This isn't one of the STAGES: the ids only mean something once every source
+has been combined, so run it on the combined frame.
+"""
+
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+DAYS = 3
+THRESHOLD = 0.8
+
+# how much each comparison counts towards a pair's score (they add up to 1)
+WEIGHTS = {'last_name': 0.35, 'first_name': 0.25, 'victims_age': 0.15, 'city': 0.15, 'date': 0.10}
+# what a comparison scores when either side is missing
+MISSING_SCORE = 0.5
+
+MISSING_NAMES = {'', 'unknown', 'none'}
+
+
+def candidate_pairs(killings, days=DAYS):
+    """Row positions (left, right) of every pair in the same state with dates at most days apart."""
+    state = pd.factorize(killings['state'])[0].astype(np.int64)
+    day = killings['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    usable = (state >= 0) & (day != np.datetime64('NaT').astype(np.int64))
+    positions = np.flatnonzero(usable)
+    if not len(positions):
+        return positions, positions
+
+    # one sortable key per row: state first, then day; days never reach 1e7
+    key = state[positions] * 10_000_000 + (day[positions] - day[positions].min())
+    order = np.argsort(key, kind='stable')
+    key, positions = key[order], positions[order]
+
+    # each row pairs with the rows after it in the sorted order up to key + days
+    end = np.searchsorted(key, key + days, side='right')
+    starts = np.arange(len(key)) + 1
+    counts = end - starts
+    left = np.repeat(np.arange(len(key)), counts)
+    right = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+    return positions[left], positions[right]
+
+
+def _name_keys(col):
+    names = col.astype(object).where(col.notna(), '').astype(str).str.strip().str.lower()
+    names = names.where(~names.isin(MISSING_NAMES), '')
+    codes, uniques = pd.factorize(names)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def _name_scores(col, left, right):
+    """
+    (score, differ, codes, uniques): score is 1 for the same name, MISSING_SCORE
+    if either is missing and 0 where the spellings differ (flagged in differ).
+    """
+    codes, uniques = _name_keys(col)
+    a, b = codes[left], codes[right]
+    missing = (uniques[a] == '') | (uniques[b] == '')
+    score = np.where(missing, MISSING_SCORE, (a == b).astype('float64'))
+    return score, (a != b) & ~missing, codes, uniques
+
+
+def _similarity(codes, uniques, left, right):
+    """SequenceMatcher ratio of each pair; each distinct pair of spellings is only compared once."""
+    pairs, inverse = np.unique(np.stack([codes[left], codes[right]], axis=1), axis=0, return_inverse=True)
+    ratios = np.array([SequenceMatcher(None, uniques[a], uniques[b]).ratio() for a, b in pairs])
+    return ratios[inverse.ravel()]
+
+
+def score_pairs(killings, left, right, days=DAYS, threshold=None):
+    """
+    Weighted similarity (0 - 1) of each candidate pair.  The string distance
+    for differently spelled names is the slow part, so with a threshold it's
+    only computed for pairs that could still reach it; the rest are scored as
+    if their names had nothing in common.
+    """
+    ages = killings['victims_age'].to_numpy(dtype='float64')
+    age_gap = np.abs(ages[left] - ages[right])
+    score = WEIGHTS['victims_age'] * np.where(np.isnan(age_gap), MISSING_SCORE, age_gap <= 1)
+
+    city, _, _, _ = _name_scores(killings['city'], left, right)
+    score += WEIGHTS['city'] * city
+
+    day = killings['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    score += WEIGHTS['date'] * (1 - np.abs(day[left] - day[right]) / (days + 1))
+
+    names = {col: _name_scores(killings[col], left, right) for col in ['first_name', 'last_name']}
+    for col, (name_score, _, _, _) in names.items():
+        score += WEIGHTS[col] * name_score
+    best_case = score + sum(WEIGHTS[col] * differ for col, (_, differ, _, _) in names.items())
+    reachable = best_case >= threshold if threshold is not None else np.ones(len(score), dtype=bool)
+
+    for col, (_, differ, codes, uniques) in names.items():
+        compare = differ & reachable
+        if compare.any():
+            score[compare] += WEIGHTS[col] * _similarity(codes, uniques, left[compare], right[compare])
+    return score
+
+
+def matched_pairs(killings, days=DAYS, threshold=THRESHOLD):
+    """The candidate pairs scoring at least threshold, as a frame of index labels and scores (for review)."""
+    left, right = candidate_pairs(killings, days)
+    score = score_pairs(killings, left, right, days, threshold)
+    keep = score >= threshold
+    return pd.DataFrame({'left': killings.index[left[keep]], 'right': killings.index[right[keep]],
+                         'score': score[keep]})
+
+
+def link_incidents(killings, days=DAYS, threshold=THRESHOLD):
+    """Add incident_id: the position of the first row of each cluster of matching rows."""
+    left, right = candidate_pairs(killings, days)
+    keep = score_pairs(killings, left, right, days, threshold) >= threshold
+    n = len(killings)
+    graph = coo_matrix((np.ones(keep.sum(), dtype=np.int8), (left[keep], right[keep])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    # number clusters by their first row so ids don't depend on how scipy labels them
+    first_row = np.full(labels.max() + 1 if n else 0, n, dtype=np.int64)
+    np.minimum.at(first_row, labels, np.arange(n))
+    killings['incident_id'] = first_row[labels]
+    return killings
@@ -0,0 +1,89 @@
+"""
+Splitting victims_name into first_name / last_name.
+
+The notebook builds HumanName(x) twice per row (once for .first, once for
+.last).  parse_names() parses each distinct name once, returns both parts
+together, and only hands names to nameparser when they aren't a plain
+"First Last" pair.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from nameparser import HumanName
+from nameparser.config import CONSTANTS
+
+from .stage_cache import memoize
+
+# Two plain words, e.g. "Mary-Jane O'Neil".  Anything with periods, commas,
+# quotes (nicknames) or more words goes through nameparser.
+SIMPLE_NAME = r"^([A-Za-z][A-Za-z'\-]*)\s+([A-Za-z][A-Za-z'\-]*)$"
+
+# Words nameparser treats specially ('Dr', 'Jr', 'de', 'and', 'III', ...).  A
+# simple name containing one of these also goes through nameparser.
+SPECIAL_WORDS = frozenset(word for words in (CONSTANTS.titles, CONSTANTS.suffix_acronyms,
+                                             CONSTANTS.suffix_not_acronyms, CONSTANTS.prefixes,
+                                             CONSTANTS.conjunctions)
+                          for word in words)
+ROMAN_NUMERAL = CONSTANTS.regexes.roman_numeral
+
+# Below this many hard names a process pool costs more than it saves
+MIN_NAMES_PER_PROCESS = 5_000
+
+
+@lru_cache(maxsize=None)
+def split_name(name):
+    """(first, last) for one name, parsed with nameparser."""
+    parsed = HumanName(name)
+    return parsed.first, parsed.last
+
+
+def _split_many(names):
+    return [split_name(name) for name in names]
+
+
+def _split_hard(names, processes):
+    if not processes or len(names) < processes * MIN_NAMES_PER_PROCESS:
+        return _split_many(names)
+    chunks = np.array_split(np.asarray(names, dtype=object), processes)
+    with ProcessPoolExecutor(processes) as pool:
+        return [pair for part in pool.map(_split_many, [list(chunk) for chunk in chunks]) for pair in part]
+
+
+@memoize(ignore=('processes',))
+def parse_names(names, processes=None):
+    """
+    Return a DataFrame with first_name and last_name for each entry in names.
+
+    Like the notebook, names containing 'police' ("Name withheld by police")
+    and missing names get NaN for both.  Pass processes=N to parse the
+    unusual names across N worker processes on large inputs.
+    """
+    codes, uniques = pd.factorize(names)
+    uniques = pd.Series(uniques, dtype=object)
+    first = pd.Series(np.nan, index=uniques.index, dtype=object)
+    last = pd.Series(np.nan, index=uniques.index, dtype=object)
+
+    to_parse = ~uniques.str.contains('police', na=True)
+    simple = uniques[to_parse].str.extract(SIMPLE_NAME)
+    special = pd.Series(False, index=simple.index)
+    for part in (simple[0], simple[1]):
+        special |= part.str.lower().isin(SPECIAL_WORDS) | part.str.match(ROMAN_NUMERAL, na=False)
+    fast = simple[0].notna() & ~special
+    first[fast[fast].index] = simple.loc[fast, 0]
+    last[fast[fast].index] = simple.loc[fast, 1]
+
+    hard = fast[~fast].index
+    if len(hard):
+        pairs = _split_hard(uniques[hard].tolist(), processes)
+        first[hard] = [pair[0] for pair in pairs]
+        last[hard] = [pair[1] for pair in pairs]
+
+    # broadcast the per-name results back to the rows (code -1 is a missing name)
+    first = pd.concat([first, pd.Series([np.nan], dtype=object)], ignore_index=True)
+    last = pd.concat([last, pd.Series([np.nan], dtype=object)], ignore_index=True)
+    index = names.index if isinstance(names, pd.Series) else None
+    return pd.DataFrame({'first_name': first.to_numpy()[codes],
+                         'last_name': last.to_numpy()[codes]}, index=index)
@@ -0,0 +1,363 @@
+"""
+The cleaning steps from "Data Cleaning - Police Killings.py" as plain functions.
+
+The notebook is still where the research happens (reading articles, looking
+things up on Google maps, etc.).  This module replays the finished cleaning so
+it can be imported and run on bigger inputs:
+
+    from cleaning import clean_killings
+    killings = clean_killings('./csv_files/police_killings_original.csv')
+
+The columns with a handful of distinct values are read straight into
+categoricals, so every lower()/map()/fillna() below only touches the
+categories instead of every row.
+"""
+
+import functools
+import inspect
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .categorical import fill_missing, replace_values, tidy_categories, transform
+from .corrections import apply_corrections
+from .dates import parse_dates
+from .geo_types import fill_geo_types
+from .names import parse_names
+from .rules import CRIMINAL_CHARGES_RULES, DISPOSITION_RULES, classify
+from .stage_cache import memoize
+from .weapons import categorize_weapons, weapon_mapping
+
+RENAME_COLUMNS = {
+    "Victim's name": "victims_name",
+    "Victim's age": "victims_age",
+    "Victim's gender": "victims_gender",
+    "Victim's race": "victims_race",
+    "URL of image of victim": "victim_img_url",
+    "Date of Incident (month/day/year)": "date",
+    "Street Address of Incident": "street_address",
+    "City": "city",
+    "State": "state",
+    "Zipcode": "zipcode",
+    "County": "county",
+    "Agency responsible for death": "agency_resp_for_death",
+    "Cause of death": "cause_of_death",
+    "A brief description of the circumstances surrounding the death": "desc_of_circumstances",
+    "Official disposition of death (justified or other)": "official_disposition_of_death",
+    "Criminal Charges?": "criminal_charges",
+    'Link to news article or photo of official document': "news_article_link",
+    'Symptoms of mental illness?': 'mental_illness',
+    "Unarmed": "unarmed",
+    'Alleged Weapon (Source: WaPo)': 'alleged_weapon',
+    'Alleged Threat Level (Source: WaPo)': 'threat_level',
+    'Fleeing (Source: WaPo)': 'fleeing',
+    'Body Camera (Source: WaPo)': 'video_surveillance',
+    'WaPo ID (If included in WaPo database)': 'WaPo_id',
+    'Off-Duty Killing?': 'off_duty_killing',
+    'Geography (via Trulia methodology based on zipcode population density: http://jedkolko.com/wp-content/uploads/2015/05/full-ZCTA-urban-suburban-rural-classification.xlsx )': 'geo_type',
+}
+
+# off_duty_killing is ~97% null, the df index identifies each row and WaPo ids can't be searched
+DROP_COLUMNS = ['WaPo_id', 'off_duty_killing', 'ID']
+
+CATEGORY_COLUMNS = ['victims_gender', 'victims_race', 'state', 'geo_type', 'cause_of_death',
+                    'threat_level', 'fleeing', 'video_surveillance', 'mental_illness', 'unarmed']
+
+# Dtypes keyed on the clean column names.  Age has 'Unknown' and '40s' mixed in with the
+# numbers, so it's read as a category and converted once per distinct value in clean_ages().
+# Dates are read as categories too and parsed once per distinct day in convert_types().
+# Zipcodes show up as floats (32218.0) in the raw file, so they're read as float and
+# narrowed to a nullable int afterwards.
+# official_disposition_of_death and criminal_charges are free text, but there are only a few
+# hundred distinct values, so the rewrite rules run once per category.
+READ_DTYPES = {
+    **{col: 'category' for col in CATEGORY_COLUMNS},
+    'official_disposition_of_death': 'category',
+    'criminal_charges': 'category',
+    'victims_age': 'category',
+    'date': 'category',
+    'zipcode': 'float64',
+}
+
+ZIPCODE_DTYPE = 'Int32'
+AGE_DTYPE = 'float32'
+
+CLEAN_CSV = 'police_killings_clean.csv'
+CLEAN_PARQUET = 'police_killings_clean.parquet'
+
+cause_of_death_dict = {"gunshot, bean bag gun": "gunshot, beanbag gun",
+                       "tasered": "taser",
+                       "beaten/bludgeoned with instrument": "beaten",
+                       "gunshot, taser": "gunshot",
+                       "gunshot, police dog": "gunshot",
+                       "gunshot, pepper spray": "gunshot",
+                       "gunshot, beanbag gun": "gunshot",
+                       "taser, pepper spray, beaten": "taser",
+                       "taser, physical restraint": "taser",
+                       "gunshot, taser, pepper spray": "gunshot",
+                       "gunshot, stabbed": "gunshot",
+                       "gunshot, vehicle": "gunshot",
+                       "gunshot, taser, baton": "gunshot",
+                       "gunshot, unspecified less lethal weapon": "gunshot",
+                       "gunshot, taser, beanbag shotgun": "gunshot",
+                       "taser, baton": "taser",
+                       "taser, beaten": "taser",
+                       "bomb": "other",
+                       "baton, pepper spray, physical restraint": "other",
+                       "pepper spray": "other",
+                       "bean bag": "other"}
+
+mental_illness_dict = {"unkown": "unknown",
+                       "unknown ": "unknown"}
+
+race_dict = {"unknown race": "unknown",
+             "asian": "asian/pacific islander",
+             "pacific islander": "asian/pacific islander"}
+
+alleged_weapon_dict = {"unclear": "unknown",
+                       "unknown weapon": "unknown",
+                       "undetermined": "unknown",
+                       "unknown object": "unknown",
+                       "air pistol": "airsoft pistol",
+                       "knife and gun": "gun and knife",
+                       "ax": "axe",
+                       "chain saw": "chainsaw",
+                       "flag pole": "flagpole",
+                       "gun and knives": "gun and knife",
+                       "gun and car": "gun and vehicle",
+                       "gun, vehicle": "gun and vehicle",
+                       "guns": "gun",
+                       "knives": "knife",
+                       "rocks": "rock",
+                       "screw driver": "screwdriver",
+                       "sticks": "stick",
+                       "unclear weapon": "unknown",
+                       "wood stick": "wooden stick",
+                       "bat": "baseball bat",
+                       "blunt weapon": "blunt object",
+                       "hammer and knife": "knife and hammer",
+                       "knife/scissors": "knife and scissors"}
+
+# %% Stages
+
+def print_null_fill(killings, col, label, value):
+    num_null = killings[col].isnull().sum()
+    print(F"There are {num_null} {label} that will be filled with '{value}'")
+
+
+def raw_dtypes():
+    """READ_DTYPES keyed on the raw CSV's column names."""
+    return {raw: READ_DTYPES[clean] for raw, clean in RENAME_COLUMNS.items() if clean in READ_DTYPES}
+
+
+@memoize
+def read_killings(path, **read_csv_kwargs):
+    """Read the raw CSV with explicit dtypes and clean column names."""
+    killings = pd.read_csv(path, dtype=raw_dtypes(), **read_csv_kwargs)
+    return killings.rename(columns=RENAME_COLUMNS)
+
+
+def drop_empty(killings):
+    """Drop all-null rows and columns plus the columns we don't use."""
+    killings = killings.dropna(how='all', axis=0)
+    killings = killings.dropna(how='all', axis=1)
+    return killings.drop(columns=DROP_COLUMNS, errors='ignore')
+
+
+def split_names(killings, processes=None):
+    names = parse_names(killings['victims_name'], processes=processes)
+    killings['first_name'] = names['first_name']
+    killings['last_name'] = names['last_name']
+    return killings
+
+
+def clean_ages(killings):
+    age_dict = {'Unknown': np.nan, '40s': 40.0}
+    ages = transform(killings['victims_age'],
+                     lambda s: pd.to_numeric(s.map(lambda x: age_dict.get(x, x)), errors='coerce'))
+    killings['victims_age'] = ages.astype(AGE_DTYPE)
+    return killings
+
+
+def clean_zipcodes(killings):
+    killings['zipcode'] = killings['zipcode'].astype(ZIPCODE_DTYPE)
+    return killings
+
+
+def clean_gender(killings):
+    print_null_fill(killings, 'victims_gender', "rows with a null gender", 'unknown')
+    killings['victims_gender'] = fill_missing(transform(killings['victims_gender'], lambda s: s.str.lower()),
+                                              'unknown')
+    return killings
+
+
+def clean_race(killings):
+    race = transform(killings['victims_race'], lambda s: s.str.lower())
+    killings['victims_race'] = replace_values(race, race_dict)
+    return killings
+
+
+def clean_locations(killings):
+    killings['victim_img_url'] = killings['victim_img_url'].fillna('None')
+
+    print_null_fill(killings, 'street_address', "null street addresses", 'unknown')
+    street_address = killings['street_address'].fillna('unknown')
+    killings['street_address'] = street_address.mask(street_address == 'Unknown', 'unknown')
+
+    print_null_fill(killings, 'city', "cities", 'unknown')
+    killings['city'] = killings['city'].fillna('unknown')
+
+    print_null_fill(killings, 'geo_type', "geo_types", 'unknown')
+    killings['geo_type'] = fill_missing(killings['geo_type'], 'unknown')
+
+    print_null_fill(killings, 'agency_resp_for_death', "rows for agency responsible for death", 'unknown')
+    killings['agency_resp_for_death'] = killings['agency_resp_for_death'].fillna('unknown')
+    return killings
+
+
+def clean_cause_of_death(killings):
+    cause_of_death = transform(killings['cause_of_death'], lambda s: s.str.lower())
+    killings['cause_of_death'] = replace_values(cause_of_death, cause_of_death_dict)
+    killings['desc_of_circumstances'] = killings['desc_of_circumstances'].fillna('Unavailable')
+    return killings
+
+
+def clean_disposition(killings):
+    col = 'official_disposition_of_death'
+    print_null_fill(killings, col, "rows for official disposition of death", 'unknown')
+    killings[col] = classify(fill_missing(killings[col], 'unknown'), DISPOSITION_RULES)
+    killings['criminal_charges'] = classify(killings['criminal_charges'], CRIMINAL_CHARGES_RULES)
+
+    killings['news_article_link'] = killings['news_article_link'].fillna('Unavailable')
+    return killings
+
+
+def normalize_weapons(alleged_weapon):
+    alleged_weapon = alleged_weapon.str.lower().str.rstrip()
+    return alleged_weapon.map(alleged_weapon_dict).fillna(alleged_weapon)
+
+
+def clean_wapo_columns(killings):
+    """Mental illness, unarmed, alleged weapon, threat level, fleeing and body camera."""
+    mental_illness = transform(killings['mental_illness'], lambda s: s.str.lower())
+    mental_illness = replace_values(mental_illness, mental_illness_dict)
+    print_null_fill(killings, 'mental_illness', "null rows for mental_illness", 'unknown')
+    killings['mental_illness'] = fill_missing(mental_illness, 'unknown')
+
+    killings['unarmed'] = transform(killings['unarmed'], lambda s: s.str.lower())
+
+    killings['alleged_weapon'] = normalize_weapons(killings['alleged_weapon'])
+
+    print_null_fill(killings, 'threat_level', "rows for threat level", 'unknown')
+    killings['threat_level'] = fill_missing(killings['threat_level'], 'unknown')
+
+    fleeing = replace_values(transform(killings['fleeing'], lambda s: s.str.lower()), {'0': 'unknown'})
+    killings['fleeing'] = fill_missing(fleeing, 'unknown')
+
+    video = transform(killings['video_surveillance'], lambda s: s.str.lower().str.replace('yes', 'body camera'))
+    killings['video_surveillance'] = fill_missing(video, 'unknown')
+    return killings
+
+
+def convert_types(killings):
+    killings['date'], unparsed = parse_dates(killings['date'])
+    if len(unparsed):
+        print(F"{len(unparsed)} dates couldn't be parsed and were left as NaT:")
+        print(unparsed.to_string(max_rows=20))
+    return tidy_categories(killings)
+
+
+# The stages in named groups, so a recorder (see instrument.py) can say which part of the clean is slow
+STAGE_GROUPS = [('empty rows', [drop_empty]),
+                ('victim name', [split_names]),
+                ('age and zipcode', [clean_ages, clean_zipcodes]),
+                ('keyed corrections', [apply_corrections]),
+                ('geo_type fixes', [fill_geo_types]),
+                ('gender and race', [clean_gender, clean_race]),
+                ('locations', [clean_locations]),
+                ('cause of death', [clean_cause_of_death]),
+                ('official disposition', [clean_disposition]),
+                ('WaPo columns', [clean_wapo_columns, categorize_weapons]),
+                ('type conversion', [convert_types])]
+
+STAGES = [stage for _, stages in STAGE_GROUPS for stage in stages]
+STAGE_GROUP = {stage: group for group, stages in STAGE_GROUPS for stage in stages}
+
+
+def file_weapon_mapping(raw_counts):
+    """
+    weapon_mapping() for a whole raw file, from the value counts of its raw
+    alleged_weapon column, for runs that only clean part of it at a time.
+    """
+    normalized = normalize_weapons(raw_counts.index.to_series()).to_numpy()
+    return weapon_mapping(raw_counts.groupby(normalized).sum())
+
+
+def with_weapon_mapping(stages, mapping):
+    """stages, with categorize_weapons using mapping instead of the one for each frame's own values."""
+    @functools.wraps(categorize_weapons)
+    def categorize(killings):
+        return categorize_weapons(killings, mapping)
+    return [categorize if stage is categorize_weapons else stage for stage in stages]
+
+
+def run_stages(killings, stages=STAGES, recorder=None):
+    """Run stages in order, through recorder.run() when a recorder is given."""
+    if recorder is None:
+        for stage in stages:
+            killings = stage(killings)
+        return killings
+    for stage in stages:
+        killings = recorder.run(stage, killings, STAGE_GROUP.get(inspect.unwrap(stage)))
+    return killings
+
+
+def clean_killings(path, recorder=None) -> pd.DataFrame:
+    """Run every cleaning stage on the raw CSV at path and return the clean frame."""
+    if recorder is None:
+        return run_stages(read_killings(path))
+    return run_stages(recorder.run(read_killings, path, 'load'), recorder=recorder)
+
+
+def save_killings(killings, directory='./csv_files'):
+    """
+    Write the clean frame as CSV (like the notebook) and as Parquet.  The
+    Parquet copy keeps the categoricals, datetimes and nullable ints, so the
+    EDA notebook doesn't have to re-parse anything.  Needs pyarrow.
+    """
+    directory = Path(directory)
+    killings.to_csv(directory / CLEAN_CSV, index=False)
+    killings.to_parquet(directory / CLEAN_PARQUET, index=False)
+
+
+# %% Memory report
+
+def peak_memory(func, *args, **kwargs):
+    """Return (result, peak bytes allocated while running func) as seen by tracemalloc."""
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def memory_report(path):
+    """Compare the untyped read the notebook does with the typed pipeline."""
+    untyped, untyped_peak = peak_memory(pd.read_csv, path)
+    typed, typed_peak = peak_memory(clean_killings, path)
+    mb = 1024 ** 2
+    print(F"untyped read_csv:  peak {untyped_peak / mb:,.1f} MB, "
+          F"frame {untyped.memory_usage(deep=True).sum() / mb:,.1f} MB")
+    print(F"clean_killings():  peak {typed_peak / mb:,.1f} MB, "
+          F"frame {typed.memory_usage(deep=True).sum() / mb:,.1f} MB")
+    return untyped_peak, typed_peak
+
+
+if __name__ == '__main__':
+    # python -m cleaning.pipeline ./cleaning/csv_files/police_killings_original.csv
+    memory_report(sys.argv[1] if len(sys.argv) > 1 else './csv_files/police_killings_original.csv')
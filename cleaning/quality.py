@@ -0,0 +1,218 @@
+"""
+One-pass data-quality profile of every column.
+
+The notebook checks the data with isnull().sum() / len * 100, .unique() on
+nearly every column, value_counts() after each rewrite and a null count
+printed before each fillna, and each of those scans the whole table again.
+profile() looks at each chunk once and keeps, per column:
+
+- rows and nulls,
+- distinct values,
+- the most common values,
+- value lengths (min / mean / max characters) or, for numbers and dates,
+  min / mean / max values.
+
+Distinct values and top values are exact while a column has at most
+EXACT_DISTINCT distinct values.  Past that the column switches to a
+HyperLogLog sketch for the distinct count and a Misra-Gries summary for the
+top values, so memory stays fixed however big the load is; those columns are
+marked "approximate" in the report.  The report is JSON with sorted keys, so
+two nights' reports can be compared with diff or compare_profiles():
+
+    report = profile_csv('./csv_files/police_killings_original.csv')
+    save_profile(report, 'profile.json')
+"""
+
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import raw_dtypes
+
+CHUNKSIZE = 100_000
+TOP_K = 10
+
+# past this many distinct values a column's counts are replaced by sketches
+EXACT_DISTINCT = 50_000
+# HyperLogLog uses 2**HLL_BITS registers; the standard error is about 1.04 / sqrt(2**HLL_BITS)
+HLL_BITS = 14
+
+
+def _hashes(col):
+    """64-bit hash of every non-null value."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()
+        return pd.util.hash_array(col.cat.categories.to_numpy(dtype=object))[codes[codes >= 0]]
+    return pd.util.hash_array(col.dropna().to_numpy(dtype=object))
+
+
+def _leading_zeros(values):
+    """Leading zero bits of each uint64, done in two 32-bit halves so float64 stays exact."""
+    high = (values >> np.uint64(32)).astype('float64')
+    low = (values & np.uint64(0xFFFFFFFF)).astype('float64')
+    zeros = np.full(len(values), 64, dtype=np.int64)
+    has_low = low > 0
+    zeros[has_low] = 63 - np.floor(np.log2(low[has_low])).astype(np.int64)
+    has_high = high > 0
+    zeros[has_high] = 31 - np.floor(np.log2(high[has_high])).astype(np.int64)
+    return zeros
+
+
+class HyperLogLog:
+    """Approximate distinct count from 64-bit hashes."""
+
+    def __init__(self, bits=HLL_BITS):
+        self.bits = bits
+        self.registers = np.zeros(1 << bits, dtype=np.uint8)
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.bits)).astype(np.int64)
+        rest = hashes << np.uint64(self.bits)
+        rank = np.minimum(_leading_zeros(rest) + 1, 64 - self.bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype('float64'))
+        empty = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and empty:
+            return m * np.log(m / empty)  # linear counting for small cardinalities
+        return raw
+
+
+def misra_gries(counts, chunk_counts, k):
+    """
+    Merge a chunk's value counts into a Misra-Gries summary of at most k
+    counters.  A value's count is underestimated by at most rows / (k + 1).
+    """
+    merged = counts.add(chunk_counts, fill_value=0)
+    if len(merged) > k:
+        merged = merged - merged.nlargest(k + 1).iloc[-1]
+        merged = merged[merged > 0]
+    return merged
+
+
+class ColumnProfile:
+    """Running statistics for one column, updated a chunk at a time."""
+
+    def __init__(self, top_k=TOP_K, exact_distinct=EXACT_DISTINCT):
+        self.top_k = top_k
+        self.exact_distinct = exact_distinct
+        self.dtype = None
+        self.rows = 0
+        self.nulls = 0
+        self.counts = pd.Series(dtype='float64')
+        self.approximate = False
+        self.hll = HyperLogLog()
+        self.low = self.high = None
+        self.total = 0.0
+        self.kind = None
+
+    def update(self, col):
+        self.dtype = self.dtype or str(col.dtype)
+        self.rows += len(col)
+        self.nulls += int(col.isna().sum())
+        self.hll.update(_hashes(col))
+
+        chunk_counts = col.value_counts(sort=False)
+        chunk_counts = chunk_counts[chunk_counts > 0].astype('float64')
+        chunk_counts.index = chunk_counts.index.astype(object)
+        if self.approximate:
+            self.counts = misra_gries(self.counts, chunk_counts, self.top_k * 10)
+        else:
+            self.counts = self.counts.add(chunk_counts, fill_value=0)
+            if len(self.counts) > self.exact_distinct:
+                self.approximate = True
+                self.counts = misra_gries(self.counts, pd.Series(dtype='float64'), self.top_k * 10)
+
+        self._update_range(col)
+
+    def _update_range(self, col):
+        if pd.api.types.is_numeric_dtype(col.dtype) or pd.api.types.is_datetime64_any_dtype(col.dtype):
+            self.kind = 'values'
+            values = col.dropna()
+            if pd.api.types.is_datetime64_any_dtype(col.dtype):
+                values = values.astype('int64')
+        else:
+            self.kind = 'length'
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                lengths = col.cat.categories.astype(str).str.len().to_numpy()
+                codes = col.cat.codes.to_numpy()
+                values = pd.Series(lengths[codes[codes >= 0]])
+            else:
+                values = col.dropna().astype(str).str.len()
+        if len(values):
+            low, high = values.min(), values.max()
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+            self.total += float(values.to_numpy(dtype='float64').sum())
+
+    def report(self):
+        present = self.rows - self.nulls
+        distinct = self.hll.estimate() if self.approximate else len(self.counts)
+        top = self.counts.sort_values(ascending=False, kind='stable').head(self.top_k)
+        summary = {'dtype': self.dtype,
+                   'rows': self.rows,
+                   'nulls': self.nulls,
+                   'null_pct': round(self.nulls / self.rows * 100, 4) if self.rows else None,
+                   'distinct': int(round(distinct)),
+                   'approximate': self.approximate,
+                   'top': [[str(value), int(count)] for value, count in top.items()]}
+        stats = {'min': self.low, 'mean': self.total / present if present else None, 'max': self.high}
+        if self.dtype.startswith('datetime64'):
+            stats = {key: None if value is None else str(pd.Timestamp(int(value))) for key, value in stats.items()}
+        else:
+            stats = {key: None if value is None else round(float(value), 4) for key, value in stats.items()}
+        summary[self.kind] = stats
+        return summary
+
+
+def profile(chunks, top_k=TOP_K, exact_distinct=EXACT_DISTINCT):
+    """Profile a DataFrame, or an iterable of DataFrame chunks, in one pass."""
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    columns = {}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for name in chunk.columns:
+            if name not in columns:
+                columns[name] = ColumnProfile(top_k, exact_distinct)
+            columns[name].update(chunk[name])
+    return {'rows': rows, 'columns': {name: column.report() for name, column in columns.items()}}
+
+
+def profile_csv(path, chunksize=CHUNKSIZE, **kwargs):
+    """Profile the raw CSV at path, reading chunksize rows at a time."""
+    return profile(pd.read_csv(path, dtype=raw_dtypes(), chunksize=chunksize), **kwargs)
+
+
+def save_profile(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def load_profile(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_profiles(old, new, fields=('rows', 'nulls', 'distinct')):
+    """The columns whose fields changed between two reports, as a DataFrame of old/new values."""
+    changes = []
+    for name in sorted(set(old['columns']) | set(new['columns'])):
+        before, after = old['columns'].get(name, {}), new['columns'].get(name, {})
+        for field in fields:
+            if before.get(field) != after.get(field):
+                changes.append((name, field, before.get(field), after.get(field)))
+    return pd.DataFrame(changes, columns=['column', 'field', 'old', 'new'])
+
+
+if __name__ == '__main__':
+    # python -m cleaning.quality raw.csv profile.json
+    save_profile(profile_csv(sys.argv[1]), sys.argv[2])
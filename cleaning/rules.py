@@ -0,0 +1,87 @@
+"""
+Ordered (pattern, label) rewrite rules compiled into a single regex.
+
+The notebook rewrites official_disposition_of_death with ~17 separate
+``killings.loc[col.str.lower().str.contains(pattern), col] = label`` cells, so
+each rule lowercases and rescans the whole column, and a later rule can
+overwrite an earlier one ('unjustified' gets turned into 'justified').
+
+Here the rules are checked in order and the FIRST rule that matches wins.
+They're compiled into one regex of lookaheads, so the rules are tried in one
+re.match call per string, but each lookahead still scans the string on its
+own: the cost is up to (number of rules) x (string length) per value.  What
+keeps it cheap is that classify() only runs the regex on the distinct values
+of the column, not on every row.
+"""
+
+import re
+
+import pandas as pd
+
+from .categorical import transform
+
+DISPOSITION_RULES = [
+    ('unjustified', 'unjustified'),
+    ('justified', 'justified'),
+    ('convicted', 'convicted'),
+    ('acquitted', 'acquitted'),
+    ('pending investigation', 'pending investigation'),
+    ('pending investigaton', 'pending investigation'),
+    ('ongoing investigation', 'under investigation'),
+    ('under investigation', 'under investigation'),
+    ('no indictment', 'no indictment'),
+    ('indicted', 'indicted'),
+    ('charged', 'charged'),
+    ('no charges', 'no charges'),
+    ('no known charges', 'no charges'),
+    ('unreported', 'unreported'),
+    ('unknown', 'unknown'),
+]
+
+CRIMINAL_CHARGES_RULES = [
+    ('^no known charges$', 'no charges'),
+    ('^no$', 'no charges'),
+    ('charged, convicted', 'charged, convicted'),
+    ('charged, mistrial', 'charged, mistrial'),
+    ('charged, charges tossed', 'charged, charges dropped'),
+    ('charged with manslaughter', 'charged with a crime'),
+]
+
+
+def compile_rules(rules):
+    """
+    Compile [(pattern, label), ...] into (regex, labels).
+
+    Every rule becomes a lookahead anchored at the start of the string, so the
+    alternation is tried in rule order and match.lastgroup names the first
+    rule that matched anywhere in the string.
+    """
+    alternatives = [F"(?=.*?(?:{pattern}))(?P<r{i}>)" for i, (pattern, _) in enumerate(rules)]
+    regex = re.compile(F"^(?:{'|'.join(alternatives)})", re.DOTALL)
+    labels = {F"r{i}": label for i, (_, label) in enumerate(rules)}
+    return regex, labels
+
+
+def label_text(text, compiled):
+    """Label for one (already lowercased) string, or None if no rule matches."""
+    regex, labels = compiled
+    match = regex.match(text)
+    return labels[match.lastgroup] if match else None
+
+
+def classify(col, rules, lower=True):
+    """
+    Rewrite col with rules.  Values that no rule matches are kept (lowercased
+    when lower=True) and missing values stay missing.  Categorical columns are
+    only scanned once per category; object columns once per distinct value.
+    """
+    compiled = compile_rules(rules)
+
+    def label_values(values):
+        if lower:
+            values = values.str.lower()
+        return values.map(lambda text: text if pd.isna(text) else (label_text(text, compiled) or text))
+
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return transform(col, label_values)
+    return transform(col.astype('category'), label_values).astype(object)
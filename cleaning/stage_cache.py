@@ -0,0 +1,287 @@
+"""
+On-disk memoization for the slow steps: reading the raw CSV, parsing names, ...
+
+Functions decorated with @memoize run as usual until the cache is turned on.
+Once it is, a call is looked up by a key made of
+
+- the function's code: its source plus the source of every function or class
+  from this repo it refers to (followed through their own references), and
+  the values of the constants they use, and
+- its arguments, defaults included: DataFrames and Series by the hash of
+  their values, index and dtypes (a categorical's categories and order
+  included), files by the digest of their contents,
+  anything else by its pickle,
+
+so editing a later step, or a helper the step doesn't use, keeps the cached
+result, and editing the step or its input doesn't.  Results are saved under
+CACHE_DIR as Parquet (DataFrames without object columns) or pickle (anything
+else), and the least recently used entries are deleted once the directory is
+bigger than MAX_BYTES.
+
+    from cleaning.stage_cache import enable_cache
+    enable_cache()
+    killings = read_killings('./csv_files/police_killings_original.csv')  # read_csv once
+    killings = read_killings('./csv_files/police_killings_original.csv')  # from the cache
+
+cached_call() does the same for a function that isn't decorated, e.g.
+cached_call(pd.read_csv, path).  With the cache off (the default) a decorated
+function costs one extra function call.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import types
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / '.stage_cache'
+MAX_BYTES = 2 * 1024 ** 3
+
+# longer strings are never taken for file paths
+_MAX_PATH = 4096
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path, size, mtime):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """sha256 of a file's contents, computed again only when its size or mtime changes."""
+    stat = os.stat(path)
+    return _file_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _is_file(value):
+    return (isinstance(value, Path) or (isinstance(value, str) and len(value) < _MAX_PATH)) \
+        and os.path.isfile(value)
+
+
+def fingerprint(value):
+    """A digest of value's contents (see the module docstring for what counts)."""
+    digest = hashlib.sha256(type(value).__qualname__.encode())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+            if isinstance(value, pd.DataFrame):
+                columns, dtypes = list(value.columns), value.dtypes
+            else:
+                columns, dtypes = [value.name], [value.dtype]
+            digest.update(repr((columns, list(map(str, dtypes)), value.index.names)).encode())
+            # str() of a categorical dtype is just 'category'; its categories decide what the codes mean
+            for dtype in dtypes:
+                if isinstance(dtype, pd.CategoricalDtype):
+                    categories = pd.util.hash_pandas_object(dtype.categories, index=False).to_numpy()
+                    digest.update(categories.tobytes() + repr(dtype.ordered).encode())
+            return digest.hexdigest()
+        except TypeError:
+            pass  # unhashable cells, e.g. lists or geometries; fall back to the pickle
+    elif _is_file(value):
+        digest.update(file_digest(value).encode())
+        return digest.hexdigest()
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            digest.update(fingerprint(item).encode())
+        return digest.hexdigest()
+    elif isinstance(value, (set, frozenset)):
+        # set order changes with the string hash seed, so sort the members' digests
+        for item in sorted(fingerprint(item) for item in value):
+            digest.update(item.encode())
+        return digest.hexdigest()
+    elif isinstance(value, dict):
+        for key, item in sorted(value.items(), key=lambda pair: repr(pair[0])):
+            digest.update(repr(key).encode() + fingerprint(item).encode())
+        return digest.hexdigest()
+    try:
+        digest.update(pickle.dumps(value, protocol=4))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+def _global_names(code):
+    """Every global name a code object (or any function nested in it) refers to."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _is_local(value):
+    """Functions and classes defined in this repo; their code is part of the key."""
+    if not (inspect.isfunction(value) or inspect.isclass(value)):
+        return False
+    try:
+        return ROOT in Path(inspect.getfile(value)).resolve().parents
+    except TypeError:  # builtins
+        return False
+
+
+def code_digest(func):
+    """Digest of func's source and of the repo code and constants it refers to."""
+    digest = hashlib.sha256()
+    seen = set()
+    todo = [func]
+    while todo:
+        obj = inspect.unwrap(todo.pop())
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            digest.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            digest.update(repr(obj).encode())
+            continue
+        functions = [obj] if inspect.isfunction(obj) else \
+            [member for member in vars(obj).values() if inspect.isfunction(member)]
+        for function in functions:
+            for name in sorted(_global_names(function.__code__)):
+                if name not in function.__globals__:
+                    continue
+                value = function.__globals__[name]
+                if _is_local(inspect.unwrap(value) if callable(value) else value):
+                    todo.append(value)
+                elif not (callable(value) or isinstance(value, types.ModuleType)):
+                    digest.update(name.encode() + fingerprint(value).encode())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Results of memoized calls, stored in directory and trimmed to max_bytes."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self._code = {}
+
+    def key(self, func, args, kwargs, ignore=()):
+        if func not in self._code:
+            self._code[func] = code_digest(func)
+        try:
+            bound = inspect.signature(func).bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name not in ignore}
+        except (TypeError, ValueError):
+            arguments = {'args': args, 'kwargs': kwargs}  # builtins without a signature
+        digest = hashlib.sha256(F'{func.__module__}.{func.__qualname__}'.encode())
+        digest.update(self._code[func].encode())
+        digest.update(fingerprint(arguments).encode())
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        return self.directory / F'{key}.parquet', self.directory / F'{key}.pickle'
+
+    def load(self, key):
+        """(True, value) for a stored key, else (False, None)."""
+        for path in self._paths(key):
+            if path.exists():
+                value = pd.read_parquet(path) if path.suffix == '.parquet' else pickle.loads(path.read_bytes())
+                os.utime(path)  # mtime is the last use, for the LRU
+                return True, value
+        return False, None
+
+    def store(self, key, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        parquet, pickled = self._paths(key)
+        tmp = self.directory / F'{key}.tmp'
+        # Parquet reads back object columns with None for NaN; pickle returns exactly what was stored
+        if type(value) is pd.DataFrame and not (value.dtypes == object).any():
+            value.to_parquet(tmp)
+            path = parquet
+        else:
+            tmp.write_bytes(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            path = pickled
+        os.replace(tmp, path)
+        self.evict()
+
+    def call(self, func, args=(), kwargs=None, ignore=()):
+        """func(*args, **kwargs), from the cache when the code and arguments were seen before."""
+        kwargs = kwargs or {}
+        key = self.key(func, args, kwargs, ignore)
+        found, value = self.load(key)
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = func(*args, **kwargs)
+        self.store(key, value)
+        return value
+
+    def entries(self):
+        """The cached files, least recently used first."""
+        if not self.directory.exists():
+            return []
+        paths = [path for path in self.directory.iterdir() if path.suffix in ('.parquet', '.pickle')]
+        return sorted(paths, key=lambda path: path.stat().st_mtime)
+
+    def size(self):
+        return sum(path.stat().st_size for path in self.entries())
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+
+    def clear(self):
+        for path in self.entries():
+            path.unlink()
+
+
+_cache = None
+
+
+def enable_cache(directory=CACHE_DIR, max_bytes=MAX_BYTES):
+    """Turn memoization on for every @memoize function; returns the StageCache."""
+    global _cache
+    _cache = StageCache(directory, max_bytes)
+    return _cache
+
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+
+def active_cache():
+    """The StageCache in use, or None when caching is off."""
+    return _cache
+
+
+def memoize(func=None, *, ignore=()):
+    """
+    Decorator: look calls up in the active cache when there is one.
+    ignore names arguments that don't change the result (e.g. processes).
+    """
+    if func is None:
+        return functools.partial(memoize, ignore=ignore)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _cache is None:
+            return func(*args, **kwargs)
+        return _cache.call(func, args, kwargs, ignore)
+    return wrapper
+
+
+def cached_call(func, *args, **kwargs):
+    """func(*args, **kwargs) through the active cache, or just the call when caching is off."""
+    if _cache is None:
+        return func(*args, **kwargs)
+    return _cache.call(func, args, kwargs)
@@ -0,0 +1,151 @@
+"""
+Chunked cleaning for raw files that don't fit in memory.
+
+Everything after drop_empty() only looks at one row at a time (renaming,
+lowercasing, the dictionary maps, fillna, type conversion), so those stages
+run on one chunk at a time and each cleaned chunk is appended to the output
+file.  The steps that need the whole file, the null-percentage report,
+dropping all-null columns and folding weapon spellings together (see
+weapons.py), come from a cheap first pass that only counts values.
+
+    clean_in_chunks('./csv_files/police_killings_original.csv',
+                    './csv_files/police_killings_clean.parquet', chunksize=100_000)
+
+Memory use is bounded by the chunk size rather than the file size.  The
+Parquet output is the same as clean_killings(path).to_parquet(out_path),
+categories included: they're sorted once every chunk has been written.
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from .pipeline import (DROP_COLUMNS, RENAME_COLUMNS, STAGES, file_weapon_mapping, raw_dtypes, run_stages,
+                       with_weapon_mapping)
+
+CHUNKSIZE = 100_000
+
+
+def scan_columns(path, chunksize=CHUNKSIZE):
+    """
+    First pass: (number of rows that aren't all null, % null per column,
+    value counts of the raw alleged_weapon column), using the clean column
+    names.  Columns that are 100% null get dropped.
+    """
+    weapon_column = {clean: raw for raw, clean in RENAME_COLUMNS.items()}['alleged_weapon']
+    rows = 0
+    not_null = None
+    weapons = pd.Series(dtype='int64')
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        chunk_not_null = chunk.notna()
+        rows += int(chunk_not_null.any(axis=1).sum())
+        counts = chunk_not_null.sum()
+        not_null = counts if not_null is None else not_null + counts
+        if weapon_column in chunk:
+            weapons = weapons.add(chunk[weapon_column].value_counts(), fill_value=0)
+    null_pct = (1 - not_null / rows) * 100 if rows else not_null.astype(float)
+    return rows, null_pct.rename(index=RENAME_COLUMNS), weapons.astype('int64')
+
+
+def iter_clean_chunks(path, keep_columns, weapons, chunksize=CHUNKSIZE, recorder=None):
+    """
+    Yield cleaned chunks, keeping only keep_columns (clean names) and folding
+    weapon spellings with the whole file's mapping, weapons (see
+    file_weapon_mapping()).  A recorder sees every chunk's stages.
+    """
+    stages = with_weapon_mapping(STAGES[1:], weapons)  # drop_empty is replaced by the first pass
+    for chunk in pd.read_csv(path, dtype=raw_dtypes(), chunksize=chunksize):
+        chunk = chunk.rename(columns=RENAME_COLUMNS).dropna(how='all', axis=0)
+        chunk = chunk[keep_columns]
+        # per-chunk "There are N nulls..." messages would just be noise
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield run_stages(chunk, stages, recorder)
+
+
+class _ParquetAppender:
+    """
+    Appends chunks to one Parquet file, using the first chunk's schema.  Each
+    chunk's categoricals only have the categories that chunk uses, so close()
+    rewrites the file one row group at a time with every column's sorted
+    union of categories, the categories clean_killings() gives the whole file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        self.writer = None
+        self.schema = None
+        self.categories = {}
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for col in chunk.columns:
+            if isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                self.categories.setdefault(col, set()).update(chunk[col].cat.categories)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            # a column that happens to be all null in the first chunk is still a string column
+            self.schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                     for field in table.schema], metadata=table.schema.metadata)
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self.writer.write_table(table.cast(self.schema))
+
+    def close(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            return
+        self.writer.close()
+
+        categories = {col: pd.CategoricalDtype(sorted(values)) for col, values in self.categories.items()}
+        # the first chunk's int8 indices may be too narrow for the union
+        schema = pa.schema([field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                            if pa.types.is_dictionary(field.type) else field for field in self.schema],
+                           metadata=self.schema.metadata)
+        source = pq.ParquetFile(self.tmp_path)
+        with pq.ParquetWriter(self.path, schema) as writer:
+            for group in range(source.num_row_groups):
+                chunk = source.read_row_group(group).to_pandas().astype(categories)
+                writer.write_table(pa.Table.from_pandas(chunk, preserve_index=False).cast(schema))
+        source.close()
+        self.tmp_path.unlink()
+
+
+def clean_in_chunks(path, out_path, chunksize=CHUNKSIZE, verbose=True, recorder=None):
+    """
+    Clean the raw CSV at path chunk by chunk, writing to out_path (.csv or
+    .parquet).  Returns the number of rows written.
+    """
+    out_path = Path(out_path)
+    rows, null_pct, weapon_counts = scan_columns(path, chunksize)
+    all_null = null_pct.index[null_pct == 100]
+    keep_columns = [col for col in null_pct.index if col not in all_null and col not in DROP_COLUMNS]
+    if verbose:
+        print(F"{rows} rows, dropping all-null columns: {list(all_null)}")
+        print(null_pct.drop(all_null).to_string())
+    weapons = file_weapon_mapping(weapon_counts)
+
+    parquet = _ParquetAppender(out_path) if out_path.suffix == '.parquet' else None
+    written = 0
+    try:
+        for chunk in iter_clean_chunks(path, keep_columns, weapons, chunksize, recorder):
+            if parquet is not None:
+                parquet.write(chunk)
+            else:
+                chunk.to_csv(out_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += len(chunk)
+    finally:
+        if parquet is not None:
+            parquet.close()
+    return written
+
+
+if __name__ == '__main__':
+    # python -m cleaning.streaming raw.csv police_killings_clean.parquet [chunksize]
+    clean_in_chunks(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else CHUNKSIZE)
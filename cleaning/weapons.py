@@ -0,0 +1,180 @@
+"""
+alleged_weapon spellings folded together and sorted into broad categories.
+
+alleged_weapon_dict in pipeline.py fixes the spelling variants that were in
+the data when the notebook was written, and the notebook's to-do list asks for
+gun, tool, knife, toy, metal object and sharp object categories.
+categorize_weapons() adds a weapon_category column from one mapping of every
+distinct value to (canonical, category), built by weapon_mapping():
+
+- values in weapon_categories.csv (value, canonical, category), the reviewed
+  mapping that ships with the repo, keep their line; it's only ever read,
+  and reviewed lines are copied into it by hand,
+- the other values are matched against the known spellings, comparing only
+  spellings that share character trigrams with them, and folded into the
+  closest one when they're similar enough ("screwdrivr" -> "screwdriver");
+  otherwise they become a new spelling.  They're taken most common first
+  (ties by value), so the mapping only depends on the value counts of the
+  whole file, not on row order or on which rows a chunk happens to hold,
+- the category comes from WEAPON_RULES (first match wins, as in rules.py).
+
+Streaming and incremental runs, which only see part of the file at a time,
+build the mapping from the whole file's counts first and pass it in.  With an
+explicit cache_path, weapon_mapping() also treats that file's lines as known
+and appends the new ones to it; nothing is written otherwise.
+
+Only the few hundred distinct values are ever compared, never the rows.
+"""
+
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .rules import compile_rules, label_text
+
+WEAPON_CATEGORIES = Path(__file__).with_name('weapon_categories.csv')
+
+# a new spelling folds into a known one at or above this SequenceMatcher ratio
+SIMILARITY = 0.88
+# known spellings compared per new value, by number of shared trigrams
+CANDIDATES = 5
+
+# (pattern, category); checked in order and the first match wins, so 'gun and knife' is a gun.
+# Toys come before guns ('toy gun', 'bb gun'), but a real knife next to a toy ('knife, toy')
+# is still a knife, which the lookahead checks since knives come after guns.
+WEAPON_RULES = [
+    (r'^(unknown|unclear|undetermined)', 'unknown'),
+    (r'^unarmed$', 'unarmed'),
+    (r'^(?!.*\bkni(fe|ves)\b).*(\btoy\b|\bbb gun|airsoft|air pistol|bean-bag)', 'toy'),
+    (r'nail gun|glue gun', 'tool'),
+    (r'\bguns?\b|pistol|rifle|revolver|firearm', 'gun'),
+    (r'\bkni(fe|ves)\b', 'knife'),
+    (r'machete|sword|\baxe?\b|pick-axe|hatchet|spear|bayonet|blade|cleaver|razor|glass shard|broken glass'
+     r'|scissors|box cutter|edged|sharp|arrow|\bbow\b|crossbow|shears|pitchfork|spike', 'sharp object'),
+    (r'metal|pipe|crowbar|tire iron|\bchain\b', 'metal object'),
+    (r'\btools?\b|hammer|mallett?|screw ?driver|wrench|drill|shovel|rake|level|chain ?saw|carjack|lawn mower',
+     'tool'),
+    (r'blunt|\bbat\b|baseball|club|stick|pole|baton|rock|brick|bottle|cane|wood|branch|\boar\b|table leg'
+     r'|chair|barstool|lamp|flashlight', 'blunt object'),
+    (r'vehicle|\bcar\b|motorcycle|\bbike\b', 'vehicle'),
+]
+OTHER = 'other'
+
+_compiled_rules = compile_rules(WEAPON_RULES)
+
+
+def weapon_category(value):
+    return label_text(value, _compiled_rules) or OTHER
+
+
+def _trigrams(text):
+    padded = F'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SpellingIndex:
+    """Known spellings, blocked by character trigram so a lookup only compares a few of them."""
+
+    def __init__(self, spellings=()):
+        self.spellings = []
+        self.by_trigram = defaultdict(list)
+        for spelling in spellings:
+            self.add(spelling)
+
+    def add(self, spelling):
+        for trigram in _trigrams(spelling):
+            self.by_trigram[trigram].append(len(self.spellings))
+        self.spellings.append(spelling)
+
+    def closest(self, text):
+        """(spelling, similarity) of the most similar known spelling, or (None, 0)."""
+        shared = Counter(i for trigram in _trigrams(text) for i in self.by_trigram.get(trigram, ()))
+        best, best_score = None, 0.0
+        for i, _ in shared.most_common(CANDIDATES):
+            score = SequenceMatcher(None, text, self.spellings[i]).ratio()
+            if score > best_score:
+                best, best_score = self.spellings[i], score
+        return best, best_score
+
+
+@lru_cache(maxsize=None)
+def _read_cache(path, mtime):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _read_lines(path):
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=['value', 'canonical', 'category'])
+    return _read_cache(str(path), path.stat().st_mtime)
+
+
+def load_weapon_lines(cache_path=None, categories_path=WEAPON_CATEGORIES):
+    """The value -> (canonical, category) lines already decided: the shipped ones, then cache_path's."""
+    paths = [categories_path] if cache_path is None else [categories_path, cache_path]
+    return pd.concat([_read_lines(path) for path in paths], ignore_index=True)
+
+
+def canonicalize(values, known):
+    """
+    New lines (value, canonical, category) for values, given the known
+    canonical spellings.  Values are clustered in the order given, so pass the
+    most common first; each one joins the closest spelling so far or starts
+    its own.
+    """
+    index = SpellingIndex(known)
+    lines = []
+    for value in values:
+        spelling, score = index.closest(value)
+        if score < SIMILARITY:
+            spelling = value
+            index.add(value)
+        lines.append((value, spelling, weapon_category(spelling)))
+    return pd.DataFrame(lines, columns=['value', 'canonical', 'category'])
+
+
+def weapon_mapping(counts, cache_path=None, categories_path=WEAPON_CATEGORIES):
+    """
+    (canonical, category) indexed by value, for the known values and every
+    value in counts (alleged_weapon value counts, as clean_wapo_columns()
+    leaves the column).  cache_path, when given, is read as known lines and
+    the new lines are appended to it.
+    """
+    known = load_weapon_lines(cache_path, categories_path)
+    unseen = counts[~counts.index.isin(known['value'])]
+    lines = known
+    if len(unseen):
+        # most common first, so a rare misspelling folds into the usual spelling rather than the reverse
+        unseen = unseen.sort_index().sort_values(ascending=False, kind='stable')
+        new = canonicalize(unseen.index, known['canonical'].unique())
+        print(F"Categorized {len(new)} new alleged_weapon values")
+        if cache_path is not None:
+            new.to_csv(cache_path, mode='a', header=not Path(cache_path).exists(), index=False)
+        lines = pd.concat([known, new], ignore_index=True)
+    return lines.drop_duplicates('value', keep='last').set_index('value')
+
+
+def categorize_weapons(killings, mapping=None):
+    """
+    Fold alleged_weapon spellings into their canonical ones and add
+    weapon_category, using mapping (see weapon_mapping()) or, by default, the
+    one for killings' own values.
+    """
+    codes, values = pd.factorize(killings['alleged_weapon'])
+    if mapping is None:
+        counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(values)), index=values)
+        mapping = weapon_mapping(counts)
+    missing = ~pd.Index(values).isin(mapping.index)
+    if missing.any():
+        raise ValueError(F"alleged_weapon values missing from the weapon mapping: {list(values[missing][:10])}")
+
+    found = mapping.reindex(values)
+    canonical = np.append(found['canonical'].to_numpy(dtype=object), np.nan)
+    category = np.append(found['category'].to_numpy(dtype=object), np.nan)
+    killings['alleged_weapon'] = pd.Series(canonical[codes], index=killings.index)
+    killings['weapon_category'] = pd.Series(pd.Categorical(category[codes]), index=killings.index)
+    return killings
@@ -0,0 +1,75 @@
+"""
+Research worklists: rows with gaps that a news article might fill.
+
+The notebook finds rows to research by looping over the rows with a null
+gender and a news link, calling killings.loc[idx].isna() and printing
+killings.loc[idx, null_col_mask].to_string() for each one.  research_worklist()
+computes the null mask once for the whole frame instead, groups the rows by
+which columns are missing, and returns one line per row ranked by how many
+gaps reading its article could fill:
+
+    worklist = research_worklist(killings, target='victims_gender')
+    write_worklist(worklist, 'gender_worklist.jsonl')
+
+The key columns are the ones corrections.csv uses, so a finding can go
+straight into a keyed correction.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from .corrections import KEY_COLUMNS
+
+LINK_COLUMN = 'news_article_link'
+
+
+def research_worklist(killings, target=None, link=LINK_COLUMN, ignore=()):
+    """
+    Rows that have a link and at least one null column (or, with target, a
+    null target column), most gaps first.  Columns: row (the df index), the
+    key columns, gaps, missing (comma separated), pattern (rows with the same
+    missing columns share an id), pattern_rows and link.
+    """
+    columns = killings.columns.drop([link, *ignore], errors='ignore')
+    mask = killings[columns].isna().to_numpy()
+    gaps = mask.sum(axis=1)
+
+    todo = killings[link].notna().to_numpy() & (gaps > 0)
+    if target is not None:
+        todo &= killings[target].isna().to_numpy()
+    rows = np.flatnonzero(todo)
+
+    # one id per distinct missing-column pattern, named once rather than once per row
+    patterns, pattern_ids, pattern_rows = np.unique(np.packbits(mask[rows], axis=1), axis=0,
+                                                    return_inverse=True, return_counts=True)
+    pattern_ids = pattern_ids.ravel()
+    names = np.array([', '.join(columns[np.unpackbits(pattern, count=len(columns)).astype(bool)])
+                      for pattern in patterns], dtype=object)
+
+    keys = [col for col in KEY_COLUMNS if col in killings.columns]
+    worklist = killings.iloc[rows][keys].rename_axis('row').reset_index()
+    worklist['gaps'] = gaps[rows]
+    worklist['missing'] = names[pattern_ids]
+    worklist['pattern'] = pattern_ids
+    worklist['pattern_rows'] = pattern_rows[pattern_ids]
+    worklist['link'] = killings[link].to_numpy()[rows]
+    return worklist.sort_values(['gaps', 'pattern_rows', 'row'], ascending=[False, False, True],
+                                kind='stable', ignore_index=True)
+
+
+def null_patterns(worklist):
+    """One line per missing-column pattern in a worklist: rows and gaps per row, biggest first."""
+    return (worklist.groupby(['pattern', 'missing'], sort=False)
+            .agg(rows=('row', 'size'), gaps=('gaps', 'first'))
+            .reset_index()
+            .sort_values(['gaps', 'rows'], ascending=False, ignore_index=True))
+
+
+def write_worklist(worklist, path):
+    """Write the worklist as JSON lines (.jsonl) or CSV (anything else)."""
+    path = Path(path)
+    if path.suffix == '.jsonl':
+        worklist.to_json(path, orient='records', lines=True, date_format='iso')
+    else:
+        worklist.to_csv(path, index=False)
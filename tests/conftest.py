@@ -0,0 +1,22 @@
+import pytest
+
+from benchmarks.synthetic import make_incidents
+
+
+def pytest_configure(config):
+    # a pandas deprecation in the cleaning code should fail the tests, not scroll past
+    config.addinivalue_line('filterwarnings', 'error::FutureWarning')
+
+
+@pytest.fixture
+def incidents():
+    """A synthetic raw incident table."""
+    return make_incidents(2_000, seed=1)
+
+
+@pytest.fixture
+def raw(incidents, tmp_path):
+    """incidents written to a raw CSV."""
+    path = tmp_path / 'raw.csv'
+    incidents.to_csv(path, index=False)
+    return path
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from cleaning.corrections import apply_corrections, load_corrections, rekey_corrections
+from cleaning.pipeline import drop_empty, read_killings
+from cleaning.stage_cache import file_digest
+
+
+def _corrections(**columns):
+    line = {'source_row': '5', 'victims_name': None, 'date': None, 'state': None, 'source_sha256': None,
+            'column': 'city', 'value': 'Researched', 'note': None}
+    return pd.DataFrame([{**line, **columns}])
+
+
+def test_shipped_table_changes_nothing_in_another_file(raw):
+    killings = drop_empty(read_killings(raw))
+    corrected = apply_corrections(killings.copy(), load_corrections(), source=raw)
+    pd.testing.assert_frame_equal(corrected, killings)
+
+
+def test_unkeyed_line_needs_its_source_file(raw):
+    killings = drop_empty(read_killings(raw))
+    corrections = _corrections(source_sha256=file_digest(raw))
+    assert (apply_corrections(killings.copy(), corrections)['city'] != 'Researched').all()
+    assert apply_corrections(killings.copy(), corrections, source=raw).loc[5, 'city'] == 'Researched'
+
+
+def test_rekeyed_line_follows_its_incident(raw, incidents, tmp_path):
+    killings = drop_empty(read_killings(raw))
+    corrections = rekey_corrections(killings, raw, _corrections())
+    assert corrections[['victims_name', 'date', 'state']].notna().all(axis=None)
+
+    # the same incidents in another order, in a file the row numbers don't refer to
+    shuffled = tmp_path / 'shuffled.csv'
+    incidents.iloc[::-1].to_csv(shuffled, index=False)
+    corrected = apply_corrections(drop_empty(read_killings(shuffled)), corrections)
+    assert corrected.loc[corrected['city'] == 'Researched', 'victims_name'].tolist() == [killings.loc[5, 'victims_name']]
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from benchmarks.synthetic import make_incidents
+from cleaning.incremental import clean_incremental
+from cleaning.pipeline import clean_killings
+
+
+def test_first_run_matches_full_rebuild(raw, tmp_path):
+    pd.testing.assert_frame_equal(clean_incremental(raw, tmp_path / 'state'), clean_killings(raw))
+
+
+def test_unchanged_rerun_reuses_every_row(raw, tmp_path, capsys):
+    clean_incremental(raw, tmp_path / 'state')
+    capsys.readouterr()
+    incremental = clean_incremental(raw, tmp_path / 'state')
+    assert 'cleaning 0 new or changed rows' in capsys.readouterr().out
+    pd.testing.assert_frame_equal(incremental, clean_killings(raw))
+
+
+def test_changed_and_appended_rows_match_full_rebuild(raw, tmp_path):
+    clean_incremental(raw, tmp_path / 'state')
+    incidents = pd.read_csv(raw, dtype=str)
+    incidents.loc[[3, 50, 700], "Victim's age"] = '40s'
+    incidents.loc[10, 'Official disposition of death (justified or other)'] = 'PENDING INVESTIGATION'
+    more = make_incidents(100, seed=2, first_id=len(incidents))
+    pd.concat([incidents, more], ignore_index=True).to_csv(raw, index=False)
+    pd.testing.assert_frame_equal(clean_incremental(raw, tmp_path / 'state'), clean_killings(raw))
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from cleaning.stage_cache import StageCache, fingerprint
+
+
+@pytest.mark.parametrize('categories, ordered', [(['x', 'y', 'z'], False), (['y', 'x'], False), (['x', 'y'], True)])
+def test_categories_are_part_of_the_fingerprint(categories, ordered):
+    values = pd.Series(pd.Categorical(['x', 'y'], categories=['x', 'y']))
+    other = pd.Series(pd.Categorical(['x', 'y'], categories=categories, ordered=ordered))
+    assert fingerprint(values) != fingerprint(other)
+    assert fingerprint(values.to_frame()) != fingerprint(other.to_frame())
+    assert fingerprint(values) == fingerprint(values.copy())
+
+
+def _categories(column):
+    return list(column.cat.categories)
+
+
+def test_call_with_other_categories_isnt_a_hit(tmp_path):
+    cache = StageCache(tmp_path)
+    values = pd.Series(['x', 'y'], dtype='category')
+    cache.call(_categories, (values,))
+    assert cache.call(_categories, (values.cat.reorder_categories(['y', 'x']),)) == ['y', 'x']
+    assert cache.hits == 0
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from cleaning.pipeline import clean_killings
+from cleaning.streaming import clean_in_chunks
+
+
+@pytest.fixture
+def incidents(incidents):
+    # sorted backwards, so the first chunks don't have the categories that sort first
+    return incidents.sort_values('State', ascending=False, kind='stable')
+
+
+def test_parquet_output_matches_clean_killings(raw, tmp_path):
+    # both go through Parquet, which reads missing strings back as None
+    clean_killings(raw).to_parquet(tmp_path / 'full.parquet', index=False)
+    rows = clean_in_chunks(raw, tmp_path / 'chunked.parquet', chunksize=300, verbose=False)
+    expected = pd.read_parquet(tmp_path / 'full.parquet')
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'chunked.parquet'), expected)
+
+
+def test_new_weapon_spellings_fold_like_a_full_clean(incidents, tmp_path):
+    # a rare spelling first and the common one in later chunks: the common one must win in both
+    incidents = incidents.copy()
+    weapon = 'Alleged Weapon (Source: WaPo)'
+    incidents.loc[incidents.index[5], weapon] = 'nunchucks'
+    incidents.loc[incidents.index[1_000:1_021], weapon] = 'nunchuck'
+    raw = tmp_path / 'weapons.csv'
+    incidents.to_csv(raw, index=False)
+
+    clean_in_chunks(raw, tmp_path / 'chunked.parquet', chunksize=200, verbose=False)
+    chunked = pd.read_parquet(tmp_path / 'chunked.parquet')
+    full = clean_killings(raw)
+    assert 'nunchuck' in set(full['alleged_weapon']) and 'nunchucks' not in set(full['alleged_weapon'])
+    assert chunked['alleged_weapon'].tolist() == full['alleged_weapon'].tolist()